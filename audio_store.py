@@ -0,0 +1,127 @@
+"""
+Memory-mapped store of pre-encoded mulaw clips
+
+One read-only file holds every fixed phrase (greetings, confirmations,
+transfer and fallback messages) as raw 8kHz mulaw, with a JSON index in
+front. Workers mmap the file instead of each rendering and holding their
+own copies, so clip pages are shared through the OS page cache.
+
+File layout:
+    MAGIC (8 bytes) | index length (uint32, little endian) | index JSON | clip data
+
+The index maps "key/language" to the clip's offset, length and a hash of
+the text it was rendered from, and records which TTS endpoint rendered the
+clips, so stale clips are re-rendered when a phrase or the endpoint changes. The store is built at deploy time (tools/build_audio_store.py)
+or by the first worker to start; builds are serialized with a file lock.
+"""
+
+import os
+import json
+import mmap
+import fcntl
+import struct
+import hashlib
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+
+AUDIO_STORE_PATH = os.getenv("AUDIO_STORE_PATH", "audio_store.bin")
+
+MAGIC = b"MULAWST1"
+_HEADER = struct.Struct("<8sI")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _clip_name(key: str, language: str) -> str:
+    return f"{key}/{language}"
+
+
+class AudioStore:
+    """Read-only view of an audio store file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an audio store")
+        index = json.loads(self._mmap[_HEADER.size:_HEADER.size + index_length])
+        self.clips = index["clips"]
+        self.source = index.get("source")
+        self._view = memoryview(self._mmap)
+
+    @classmethod
+    def open(cls, path: str):
+        """Open the store, or None if it is missing or unreadable"""
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+    def __len__(self) -> int:
+        return len(self.clips)
+
+    def has(self, key: str, language: str, text: str) -> bool:
+        """True if the clip exists and was rendered from this exact text"""
+        clip = self.clips.get(_clip_name(key, language))
+        return clip is not None and clip["text_sha1"] == text_hash(text)
+
+    def get(self, key: str, language: str):
+        """Clip audio as a zero-copy memoryview into the mapped file, or None"""
+        clip = self.clips.get(_clip_name(key, language))
+        if clip is None:
+            return None
+        return self._view[clip["offset"]:clip["offset"] + clip["length"]]
+
+    @property
+    def size(self) -> int:
+        return len(self._mmap)
+
+
+def write_store(path: str, clips: dict, source: str = None):
+    """Atomically write a store; clips maps (key, language) -> (text, mulaw bytes), source is the TTS endpoint"""
+    entries = {}
+    offset = 0
+    for (key, language), (text, mulaw) in clips.items():
+        entries[_clip_name(key, language)] = {"offset": offset, "length": len(mulaw), "text_sha1": text_hash(text)}
+        offset += len(mulaw)
+
+    # Offsets in the index are absolute, so they depend on the index length itself
+    data_start = 0
+    while True:
+        index = json.dumps({"version": 1, "sample_rate": 8000, "source": source, "clips": {
+            name: dict(entry, offset=entry["offset"] + data_start) for name, entry in entries.items()
+        }}).encode("utf-8")
+        if _HEADER.size + len(index) == data_start:
+            break
+        data_start = _HEADER.size + len(index)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".audio_store-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, len(index)))
+            f.write(index)
+            for text, mulaw in clips.values():
+                f.write(mulaw)
+        os.replace(tmp_path, path)  # Readers see the old file or the new one, never a partial one
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@asynccontextmanager
+async def build_lock(path: str):
+    """Exclusive lock so only one process builds the store at a time"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)  # Waits off the event loop
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
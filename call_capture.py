@@ -0,0 +1,131 @@
+"""
+Opt-in call capture for performance regression testing
+
+When CALL_CAPTURE_DIR is set, every media stream writes a gzip-compressed
+JSON-lines file with everything needed to replay the call:
+
+- Inbound Twilio events (start, stop, ...) with arrival offsets
+- Inbound mulaw media frames (base64 payload as received) with arrival offsets
+- Turn decisions made by VAD (bytes buffered, trigger reason, outcome)
+- Upstream Sarvam AI requests (stage, start offset, duration, response summary)
+
+All "t" values are milliseconds since the WebSocket was accepted.
+Use tools/replay_call.py to feed a capture back through /media-stream.
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+from loguru import logger
+
+CAPTURE_VERSION = 1
+
+
+class CallRecorder:
+    """Writes one capture file per media stream"""
+
+    def __init__(self, capture_dir: str):
+        self.capture_dir = capture_dir
+        self.path = None
+        self._file = None
+        self._pending = []  # Records received before the start event names the file
+        self._t0 = asyncio.get_event_loop().time()
+
+    @classmethod
+    def from_env(cls):
+        """Return a recorder if CALL_CAPTURE_DIR is set, otherwise None"""
+        capture_dir = os.getenv("CALL_CAPTURE_DIR")
+        if not capture_dir:
+            return None
+        try:
+            os.makedirs(capture_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"⚠️ Call capture disabled, cannot create {capture_dir}: {e}")
+            return None
+        return cls(capture_dir)
+
+    def offset_ms(self, loop_time: float = None) -> float:
+        """Milliseconds since the stream was accepted (for a loop.time() value, or now)"""
+        if loop_time is None:
+            loop_time = asyncio.get_event_loop().time()
+        return round((loop_time - self._t0) * 1000, 1)
+
+    def _write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        if self._file is None:
+            self._pending.append(line)
+        else:
+            self._file.write(line.encode("utf-8"))
+
+    def _open(self, name: str):
+        safe_name = "".join(c for c in name if c.isalnum() or c in "-_") or "call"
+        self.path = os.path.join(self.capture_dir, f"{safe_name}-{int(time.time())}.jsonl.gz")
+        try:
+            self._file = gzip.open(self.path, "wb", compresslevel=6)
+        except OSError as e:
+            logger.warning(f"⚠️ Call capture disabled, cannot open {self.path}: {e}")
+            self._file = None
+            self._pending = []
+            self.path = None
+            return
+        header = {"type": "header", "version": CAPTURE_VERSION, "created": time.time()}
+        self._file.write((json.dumps(header) + "\n").encode("utf-8"))
+        for line in self._pending:
+            self._file.write(line.encode("utf-8"))
+        self._pending = []
+        logger.info(f"📼 Capturing call to {self.path}")
+
+    def event(self, event: dict):
+        """Record an inbound Twilio event (media frames are stored compactly)"""
+        t = self.offset_ms()
+        event_type = event.get("event")
+        if event_type == "media":
+            self._write({"type": "media", "t": t, "payload": event["media"]["payload"]})
+            return
+        if event_type == "start" and self._file is None:
+            start = event.get("start", {})
+            self._open(start.get("callSid") or start.get("streamSid") or "call")
+        self._write({"type": "twilio", "t": t, "event": event})
+
+    def turn(self, num_bytes: int, reason: str, outcome: str):
+        """Record a VAD endpointing decision"""
+        self._write({"type": "turn", "t": self.offset_ms(), "bytes": num_bytes,
+                     "reason": reason, "outcome": outcome})
+
+    def upstream(self, stage: str, started: float, duration: float, **details):
+        """Record an upstream request (started is a loop.time() value, duration in seconds)"""
+        record = {"type": "upstream", "t": self.offset_ms(started), "stage": stage,
+                  "duration_ms": round(duration * 1000, 1)}
+        record.update(details)
+        self._write(record)
+
+    def close(self):
+        """Flush and close the capture file"""
+        if self._file is None:
+            if self._pending:
+                logger.warning("⚠️ Call capture discarded, stream never started")
+            self._pending = []
+            return
+        try:
+            self._file.close()
+            logger.info(f"📼 Capture saved: {self.path}")
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to close capture {self.path}: {e}")
+        self._file = None
+
+
+def load_capture(path: str) -> list:
+    """Load a capture file into a list of records"""
+    records = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    if not records or records[0].get("type") != "header":
+        raise ValueError(f"{path} is not a call capture")
+    if records[0].get("version") != CAPTURE_VERSION:
+        raise ValueError(f"{path} has unsupported capture version {records[0].get('version')}")
+    return records
@@ -0,0 +1,145 @@
+"""
+Per-call session state and the live call registry
+
+CallSession holds everything one media stream needs between events: the
+speech buffers, VAD thresholds, turn state and conversation. It uses
+__slots__ so each live call carries only these fields (no per-instance
+__dict__). The CallRegistry tracks active sessions so /calls can show
+what every call in this process is doing while it runs.
+"""
+
+import os
+import time
+from playout import PlaybackTracker
+
+# Voice Activity Detection (VAD) settings, in mulaw bytes at 8kHz
+SILENCE_THRESHOLD = 1600  # ~200ms of silence ends a turn
+MIN_SPEECH_LENGTH = 4000  # Minimum 0.5 seconds of speech
+MAX_TURN_MS = int(os.getenv("MAX_TURN_MS", "30000"))  # Longest turn; long turns are transcribed in segments
+MAX_SPEECH_LENGTH = MAX_TURN_MS * 8
+INITIAL_NOISE_FLOOR = 500  # Higher to avoid false triggers
+INITIAL_SPEECH_THRESHOLD = 1000  # Higher for clearer speech
+
+MAX_FAILED_STT_ATTEMPTS = 3  # Offer human transfer after 3 consecutive failures
+MAX_HISTORY_MESSAGES = 11  # System prompt + last 10 messages
+
+
+class CallSession:
+    """State of one media stream, from WebSocket accept to close"""
+
+    __slots__ = (
+        "stream_sid", "call_sid", "language", "started_at", "recorder", "playback", "messages",
+        "audio_buffer", "silence_buffer", "speech_pauses", "stt_segments", "is_speaking", "is_processing", "noise_floor", "speech_threshold",
+        "state", "state_since", "turns", "ignored_turns", "query_count", "failed_stt_count",
+        "last_user_query", "last_latency_ms", "mask", "masked_turns",
+        "ivr_task", "ivr_attempts", "route_tier",
+    )
+
+    def __init__(self, language: str, recorder=None):
+        self.stream_sid = None
+        self.call_sid = None
+        self.language = language
+        self.started_at = time.monotonic()
+        self.recorder = recorder  # Opt-in CallRecorder (CALL_CAPTURE_DIR)
+        self.playback = PlaybackTracker()  # What the caller has heard (bulk playout mode)
+        self.messages = []  # Initialized with the system prompt when the language is known
+
+        self.audio_buffer = bytearray()
+        self.silence_buffer = bytearray()
+        self.speech_pauses = []  # audio_buffer offsets where speech resumed after a pause (segment cut points)
+        self.stt_segments = None  # SegmentedSTT once a turn outgrows STT_SEGMENT_MS
+        self.is_speaking = False
+        self.is_processing = False  # Prevent concurrent processing
+        self.noise_floor = INITIAL_NOISE_FLOOR
+        self.speech_threshold = INITIAL_SPEECH_THRESHOLD
+
+        self.state = "connecting"
+        self.state_since = self.started_at
+        self.turns = 0  # Turns sent to STT
+        self.ignored_turns = 0  # Too short, or arrived while busy
+        self.query_count = 0  # Successfully transcribed queries
+        self.failed_stt_count = 0  # Consecutive STT failures
+        self.last_user_query = None  # Remember last query for context
+        self.last_latency_ms = {}  # stage -> latency of the most recent turn
+        self.mask = None  # Pending LatencyMask while a reply is being prepared
+        self.masked_turns = 0  # Turns where the acknowledgement clip played
+        self.ivr_task = None  # In-stream language menu, while waiting for a digit
+        self.ivr_attempts = 0
+        self.route_tier = 0  # model_router tier used for the last reply (0 = full)
+
+    def set_state(self, state: str):
+        """menu, listening, stt, llm, tts, playing, ..."""
+        self.state = state
+        self.state_since = time.monotonic()
+
+    def reset_speech(self):
+        """Drop buffered speech and wait for the next utterance"""
+        self.audio_buffer.clear()
+        self.silence_buffer.clear()
+        self.speech_pauses.clear()
+        self.is_speaking = False
+        if self.stt_segments is not None:
+            self.stt_segments.cancel()
+            self.stt_segments = None
+
+    @property
+    def speech_bytes(self) -> int:
+        """Speech in the current turn, including segments already sent to STT"""
+        if self.stt_segments is None:
+            return len(self.audio_buffer)
+        return self.stt_segments.captured + len(self.audio_buffer) - self.stt_segments.overlap
+
+    def record_latency(self, stage: str, seconds: float):
+        self.last_latency_ms[stage] = round(seconds * 1000, 1)
+
+    @property
+    def duration(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "stream_sid": self.stream_sid,
+            "call_sid": self.call_sid,
+            "language": self.language,
+            "duration_s": round(now - self.started_at, 1),
+            "state": self.state,
+            "state_age_s": round(now - self.state_since, 1),
+            "speaking": self.is_speaking,
+            "turns": self.turns,
+            "ignored_turns": self.ignored_turns,
+            "queries": self.query_count,
+            "failed_stt": self.failed_stt_count,
+            "masked_turns": self.masked_turns,
+            "route_tier": self.route_tier,
+            "audio_buffer_bytes": len(self.audio_buffer),
+            "turn_speech_bytes": self.speech_bytes,
+            "stt_segments": len(self.stt_segments.tasks) if self.stt_segments else 0,
+            "silence_buffer_bytes": len(self.silence_buffer),
+            "history_messages": len(self.messages),
+            "last_latency_ms": dict(self.last_latency_ms),
+        }
+
+
+class CallRegistry:
+    """Active call sessions in this process, keyed by stream SID"""
+
+    def __init__(self):
+        self._sessions = {}
+
+    def add(self, session: CallSession):
+        self._sessions[session.stream_sid] = session
+
+    def remove(self, session: CallSession):
+        if self._sessions.get(session.stream_sid) is session:
+            del self._sessions[session.stream_sid]
+
+    def get(self, stream_sid: str):
+        return self._sessions.get(stream_sid)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def snapshot(self) -> dict:
+        sessions = sorted(self._sessions.values(), key=lambda s: s.started_at)
+        return {"active": len(sessions), "calls": [session.snapshot() for session in sessions]}
@@ -0,0 +1,290 @@
+"""
+Outbound dialing campaigns
+
+Dials batches of numbers (e.g. outage notifications) through the Twilio REST
+API with aiohttp, so dialing never blocks the event loop that serves media
+streams. Each campaign has a calls-per-second limit and a cap on concurrent
+active calls; a slot is freed when Twilio's status callback reports the call
+finished (or after CAMPAIGN_CALL_TIMEOUT seconds without one). Callbacks are
+separate requests and can arrive out of order: they are applied in
+SequenceNumber order, a finished call never goes back to ringing, and a
+callback that arrives before create_call has returned the CallSid is kept
+until the call is registered.
+
+The campaign API dials numbers on the account's bill, so it requires
+"Authorization: Bearer <CAMPAIGN_API_TOKEN>" and is disabled while the
+token is unset. Status callbacks are checked against X-Twilio-Signature.
+
+TWILIO_API_BASE_URL points the dialer at a local stand-in for testing
+(see tools/twilio_standin.py).
+"""
+
+import os
+import re
+import hmac
+import time
+import uuid
+import asyncio
+import aiohttp
+from loguru import logger
+
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+CAMPAIGN_CALLS_PER_SECOND = float(os.getenv("CAMPAIGN_CALLS_PER_SECOND", "1"))
+CAMPAIGN_MAX_ACTIVE_CALLS = int(os.getenv("CAMPAIGN_MAX_ACTIVE_CALLS", "10"))
+CAMPAIGN_MAX_NUMBERS = int(os.getenv("CAMPAIGN_MAX_NUMBERS", "10000"))
+CAMPAIGN_CALL_TIMEOUT = float(os.getenv("CAMPAIGN_CALL_TIMEOUT", "600"))
+CAMPAIGN_HISTORY = 50  # Finished campaigns kept in memory
+EARLY_CALLBACK_TTL = 60  # Seconds a callback for a not-yet-registered CallSid is kept
+CAMPAIGN_API_TOKEN = os.getenv("CAMPAIGN_API_TOKEN")  # Unset disables the campaign API
+
+E164_PATTERN = re.compile(r"^\+[1-9]\d{7,14}$")
+TERMINAL_STATUSES = {"completed", "busy", "no-answer", "failed", "canceled"}
+
+
+def token_authorized(authorization: str) -> bool:
+    """Whether an Authorization header carries CAMPAIGN_API_TOKEN (always False while it is unset)"""
+    if not CAMPAIGN_API_TOKEN or not authorization:
+        return False
+    scheme, _, token = authorization.partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode(), CAMPAIGN_API_TOKEN.encode())
+
+
+class TwilioDialer:
+    """Creates calls through the Twilio REST API without blocking the event loop"""
+
+    def __init__(self):
+        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.from_number = os.getenv("TWILIO_PHONE_NUMBER")
+        self.calls_url = f"{TWILIO_API_BASE_URL.rstrip('/')}/2010-04-01/Accounts/{self.account_sid}/Calls.json"
+        self.session = None
+
+    async def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self.session
+
+    async def create_call(self, to: str, url: str, status_callback: str = None, retry_count: int = 3) -> dict:
+        """Create a call; returns Twilio's call resource (dict with 'sid' and 'status')"""
+        data = [("To", to), ("From", self.from_number), ("Url", url)]
+        if status_callback:
+            data.append(("StatusCallback", status_callback))
+            for event in ("initiated", "ringing", "answered", "completed"):
+                data.append(("StatusCallbackEvent", event))
+
+        for attempt in range(retry_count):
+            session = await self.get_session()
+            async with session.post(self.calls_url, data=data) as response:
+                if response.status in (200, 201):
+                    return await response.json()
+                error_text = await response.text()
+                # 429: account CPS exceeded on Twilio's side, back off and retry
+                if response.status == 429 and attempt < retry_count - 1:
+                    logger.warning(f"⏳ Twilio rate limited call to {to}, retrying...")
+                    await asyncio.sleep(1.0 * (attempt + 1))
+                    continue
+                raise RuntimeError(f"Twilio API error {response.status}: {error_text[:200]}")
+        raise RuntimeError("Twilio API retries exhausted")
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+
+class Campaign:
+    """A batch of numbers dialed with a rate limit and an active-call cap"""
+
+    def __init__(self, numbers: list, calls_per_second: float, max_active_calls: int, early_callbacks: dict = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.calls_per_second = calls_per_second
+        self.max_active_calls = max_active_calls
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancelled = False
+        self.entries = [{"to": number, "status": "queued", "call_sid": None, "error": None,
+                         "dialed_at": None, "ended_at": None, "duration_s": None}
+                        for number in numbers]
+        self.active_calls = 0
+        self._slots = asyncio.Semaphore(max_active_calls)
+        self._by_call_sid = {}  # call_sid -> entry
+        self._done_events = {}  # call_sid -> asyncio.Event set on terminal status
+        self._sequence = {}  # call_sid -> SequenceNumber of the last applied callback
+        self._early_callbacks = early_callbacks if early_callbacks is not None else {}  # Shared with CampaignManager
+        self._task = None
+
+    def summary(self, include_entries: bool = False) -> dict:
+        counts = {}
+        for entry in self.entries:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        result = {
+            "campaign_id": self.id,
+            "state": "cancelled" if self.cancelled else ("finished" if self.finished_at else "running"),
+            "total": len(self.entries),
+            "counts": counts,
+            "active_calls": self.active_calls,
+            "calls_per_second": self.calls_per_second,
+            "max_active_calls": self.max_active_calls,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_entries:
+            result["numbers"] = self.entries
+        return result
+
+    def update_status(self, call_sid: str, status: str, duration: str = None, sequence: int = None):
+        """Apply a Twilio status callback, ignoring ones older than what was already applied"""
+        entry = self._by_call_sid.get(call_sid)
+        if entry is None:
+            return
+        if sequence is not None:
+            if sequence <= self._sequence.get(call_sid, -1):
+                return
+            self._sequence[call_sid] = sequence
+        if entry["status"] in TERMINAL_STATUSES and status not in TERMINAL_STATUSES:
+            return  # A late ringing/in-progress must not overwrite the final status
+        entry["status"] = status
+        if duration:
+            entry["duration_s"] = int(duration)
+        if status in TERMINAL_STATUSES:
+            entry["ended_at"] = time.time()
+            event = self._done_events.get(call_sid)
+            if event:
+                event.set()
+
+    async def run(self, dialer: TwilioDialer, answer_url: str, status_callback: str):
+        """Dial every queued number, respecting the rate limit and active-call cap"""
+        interval = 1.0 / self.calls_per_second
+        loop = asyncio.get_event_loop()
+        next_dial_at = loop.time()
+        calls = []
+        try:
+            for entry in self.entries:
+                await self._slots.acquire()
+                delay = next_dial_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.cancelled:
+                    self._slots.release()
+                    break
+                next_dial_at = max(next_dial_at, loop.time()) + interval
+                calls.append(asyncio.create_task(self._dial(dialer, entry, answer_url, status_callback)))
+            self._cancel_undialed()
+            await asyncio.gather(*calls)
+        finally:
+            self._cancel_undialed()
+            self.finished_at = time.time()
+            logger.info(f"📣 Campaign {self.id} finished: {self.summary()['counts']}")
+
+    async def _dial(self, dialer: TwilioDialer, entry: dict, answer_url: str, status_callback: str):
+        """Place one call and hold its active slot until it ends"""
+        entry["status"] = "dialing"
+        entry["dialed_at"] = time.time()
+        self.active_calls += 1
+        try:
+            call = await dialer.create_call(entry["to"], answer_url, status_callback)
+            call_sid = call["sid"]
+            entry["call_sid"] = call_sid
+            entry["status"] = call.get("status", "queued")
+            done = self._done_events[call_sid] = asyncio.Event()
+            self._by_call_sid[call_sid] = entry
+            # Callbacks Twilio sent before create_call returned
+            for update in self._early_callbacks.pop(call_sid, (None, []))[1]:
+                self.update_status(call_sid, *update)
+            try:
+                await asyncio.wait_for(done.wait(), timeout=CAMPAIGN_CALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ No final status for {call_sid} after {CAMPAIGN_CALL_TIMEOUT:.0f}s, freeing slot")
+                entry["error"] = "no final status callback"
+            self._done_events.pop(call_sid, None)
+        except Exception as e:
+            logger.error(f"❌ Campaign {self.id}: failed to dial {entry['to']}: {e}")
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            entry["ended_at"] = time.time()
+        finally:
+            self.active_calls -= 1
+            self._slots.release()
+
+    def has_call(self, call_sid: str) -> bool:
+        return call_sid in self._by_call_sid
+
+    def _cancel_undialed(self):
+        for entry in self.entries:
+            if entry["status"] == "queued" and entry["call_sid"] is None:
+                entry["status"] = "canceled"
+
+    def cancel(self):
+        """Stop dialing new numbers; calls already placed continue"""
+        self.cancelled = True
+
+
+class CampaignManager:
+    """Process-wide registry of campaigns and the call SIDs they placed"""
+
+    def __init__(self, dialer: TwilioDialer):
+        self.dialer = dialer
+        self.campaigns = {}
+        self.early_callbacks = {}  # call_sid -> (received_at, [(status, duration, sequence)])
+
+    @staticmethod
+    def validate_numbers(numbers) -> tuple:
+        """Returns (unique valid numbers, invalid entries)"""
+        if not isinstance(numbers, list):
+            raise ValueError("'numbers' must be a list of E.164 phone numbers")
+        if len(numbers) > CAMPAIGN_MAX_NUMBERS:
+            raise ValueError(f"At most {CAMPAIGN_MAX_NUMBERS} numbers per campaign")
+        valid, invalid, seen = [], [], set()
+        for number in numbers:
+            if not isinstance(number, str) or not E164_PATTERN.match(number.strip()):
+                invalid.append(number)
+            elif number.strip() not in seen:
+                seen.add(number.strip())
+                valid.append(number.strip())
+        return valid, invalid
+
+    def start(self, numbers: list, answer_url: str, status_callback: str,
+              calls_per_second: float = None, max_active_calls: int = None) -> Campaign:
+        campaign = Campaign(
+            numbers,
+            calls_per_second=calls_per_second or CAMPAIGN_CALLS_PER_SECOND,
+            max_active_calls=max_active_calls or CAMPAIGN_MAX_ACTIVE_CALLS,
+            early_callbacks=self.early_callbacks,
+        )
+        self.campaigns[campaign.id] = campaign
+        self._prune()
+        campaign._task = asyncio.create_task(campaign.run(self.dialer, answer_url, status_callback))
+        logger.info(f"📣 Campaign {campaign.id} started: {len(numbers)} numbers, "
+                    f"{campaign.calls_per_second} calls/s, max {campaign.max_active_calls} active")
+        return campaign
+
+    def get(self, campaign_id: str):
+        return self.campaigns.get(campaign_id)
+
+    def update_status(self, call_sid: str, status: str, duration: str = None, sequence: int = None) -> bool:
+        """Route a Twilio status callback; returns False for calls no campaign has registered (yet)"""
+        for campaign in self.campaigns.values():
+            if campaign.has_call(call_sid):
+                campaign.update_status(call_sid, status, duration, sequence)
+                return True
+        if call_sid and any(campaign.finished_at is None for campaign in self.campaigns.values()):
+            # Twilio can call back before create_call returns the SID; the dialing campaign applies it on registration
+            now = time.monotonic()
+            for stale in [sid for sid, (received_at, _) in self.early_callbacks.items() if now - received_at > EARLY_CALLBACK_TTL]:
+                del self.early_callbacks[stale]
+            self.early_callbacks.setdefault(call_sid, (now, []))[1].append((status, duration, sequence))
+        return False
+
+    def _prune(self):
+        finished = sorted((c for c in self.campaigns.values() if c.finished_at), key=lambda c: c.finished_at)
+        for campaign in finished[:max(0, len(finished) - CAMPAIGN_HISTORY)]:
+            del self.campaigns[campaign.id]
+
+    async def close(self):
+        for campaign in self.campaigns.values():
+            campaign.cancel()
+            if campaign._task and not campaign._task.done():
+                campaign._task.cancel()
+        await self.dialer.close()
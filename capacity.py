@@ -0,0 +1,227 @@
+"""
+Capacity management: upstream concurrency limits and call admission control
+
+UpstreamLimiter caps concurrent requests to one Sarvam AI endpoint. Excess
+requests wait in a bounded queue (up to SARVAM_QUEUE_TIMEOUT seconds), and
+queue times are tracked so overload shows up in /metrics before it shows
+up as timeouts.
+
+AdmissionController caps active media streams. /voice/incoming reserves a
+slot for the call (held for ADMISSION_RESERVATION_TTL seconds while the IVR
+runs); when full, the caller gets fast overload TwiML instead of a stream
+that would perform badly. With several workers the webhook and the media
+stream usually reach different processes, so reservations, active streams
+and counters are kept in one small JSON file (ADMISSION_STATE_PATH) under
+an fcntl lock, and MAX_ACTIVE_STREAMS applies to the whole host.
+"""
+
+import os
+import json
+import time
+import fcntl
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from loguru import logger
+
+MAX_ACTIVE_STREAMS = int(os.getenv("MAX_ACTIVE_STREAMS", "50"))
+ADMISSION_RESERVATION_TTL = float(os.getenv("ADMISSION_RESERVATION_TTL", "60"))
+ADMISSION_STATE_PATH = os.getenv("ADMISSION_STATE_PATH", "admission_state.json")  # Shared state with several workers
+SARVAM_MAX_QUEUE = int(os.getenv("SARVAM_MAX_QUEUE", "100"))
+SARVAM_QUEUE_TIMEOUT = float(os.getenv("SARVAM_QUEUE_TIMEOUT", "5"))
+
+QUEUE_TIME_SAMPLES = 500  # Recent queue times kept per endpoint for percentiles
+
+
+class UpstreamOverloaded(Exception):
+    """Raised when an upstream queue is full or the wait for a slot times out"""
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class UpstreamLimiter:
+    """Concurrency limit with a bounded wait queue for one upstream endpoint"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int = SARVAM_MAX_QUEUE,
+                 queue_timeout: float = SARVAM_QUEUE_TIMEOUT):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.queued = 0  # Requests that had to wait for a slot
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent_waits = deque(maxlen=QUEUE_TIME_SAMPLES)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of a request"""
+        start = time.perf_counter()
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # Free slot: returns without waiting
+        else:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise UpstreamOverloaded(f"{self.name} queue full ({self.waiting} waiting)")
+            self.queued += 1
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise UpstreamOverloaded(f"{self.name} slot wait exceeded {self.queue_timeout:.1f}s")
+            finally:
+                self.waiting -= 1
+
+        wait = time.perf_counter() - start
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self._recent_waits.append(wait)
+        if wait > 0.5:
+            logger.warning(f"⏳ {self.name} request queued for {wait:.2f}s ({self.in_flight} in flight)")
+
+        self.in_flight += 1
+        try:
+            yield wait
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        recent = sorted(self._recent_waits)
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "queue_ms": {
+                "mean": round(self.total_wait / self.requests * 1000, 1) if self.requests else 0.0,
+                "p50": round(_percentile(recent, 0.50) * 1000, 1),
+                "p95": round(_percentile(recent, 0.95) * 1000, 1),
+                "max": round(self.max_wait * 1000, 1),
+            },
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class AdmissionController:
+    """Caps active media streams; slots are reserved when the call is answered
+
+    state_path: share the limit between worker processes through this file (None = this process only)
+    """
+
+    def __init__(self, max_streams: int = MAX_ACTIVE_STREAMS, reservation_ttl: float = ADMISSION_RESERVATION_TTL,
+                 state_path: str = None):
+        self.max_streams = max_streams
+        self.reservation_ttl = reservation_ttl
+        self.state_path = state_path
+        self.active = {}  # stream_id -> pid of the worker serving it
+        self._reservations = {}  # call_sid -> expiry (time.time(), comparable across workers)
+        self.admitted = 0
+        self.rejected = 0
+        self.peak_active = 0
+
+    @contextmanager
+    def _state(self):
+        """Current state, written back on exit; with state_path, loaded from and saved to the shared file under a lock"""
+        if not self.state_path:
+            self._purge()
+            yield
+            return
+        with open(self.state_path, "a+") as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)  # Held for one small read-modify-write
+            try:
+                state_file.seek(0)
+                data = state_file.read()
+                state = json.loads(data) if data else {}
+                self.active = state.get("active", {})
+                self._reservations = state.get("reservations", {})
+                self.admitted = state.get("admitted", 0)
+                self.rejected = state.get("rejected", 0)
+                self.peak_active = state.get("peak_active", 0)
+                self._purge()
+                yield
+                state_file.seek(0)
+                state_file.truncate()
+                json.dump({"active": self.active, "reservations": self._reservations, "admitted": self.admitted,
+                           "rejected": self.rejected, "peak_active": self.peak_active}, state_file)
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    def _purge(self):
+        now = time.time()
+        for call_sid in [sid for sid, expiry in self._reservations.items() if expiry < now]:
+            del self._reservations[call_sid]
+        if self.state_path:
+            # Streams of a worker that died without running stream_ended
+            for stream_id in [sid for sid, pid in self.active.items() if not _process_alive(pid)]:
+                del self.active[stream_id]
+
+    @property
+    def load(self) -> int:
+        with self._state():
+            return len(self.active) + len(self._reservations)
+
+    def try_admit(self, call_sid: str) -> bool:
+        """Reserve a stream slot for an incoming call; False when at capacity"""
+        with self._state():
+            if call_sid in self._reservations:
+                return True
+            if len(self.active) + len(self._reservations) >= self.max_streams:
+                self.rejected += 1
+                logger.warning(f"🚦 At capacity ({len(self.active)} active, {len(self._reservations)} reserved), "
+                               f"not admitting {call_sid}")
+                return False
+            self._reservations[call_sid] = time.time() + self.reservation_ttl
+            self.admitted += 1
+            return True
+
+    def stream_started(self, call_sid: str, stream_id: str) -> bool:
+        """Turn a reservation into an active stream; unreserved streams get a slot only if one is free"""
+        with self._state():
+            reserved = self._reservations.pop(call_sid, None) is not None
+            if not reserved:
+                if len(self.active) + len(self._reservations) >= self.max_streams:
+                    self.rejected += 1
+                    return False
+                self.admitted += 1
+            self.active[stream_id] = os.getpid()
+            self.peak_active = max(self.peak_active, len(self.active))
+            return True
+
+    def stream_ended(self, stream_id: str):
+        with self._state():
+            self.active.pop(stream_id, None)
+
+    def snapshot(self) -> dict:
+        with self._state():
+            return {
+                "max_streams": self.max_streams,
+                "shared": bool(self.state_path),
+                "active": len(self.active),
+                "reserved": len(self._reservations),
+                "peak_active": self.peak_active,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
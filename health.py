@@ -0,0 +1,144 @@
+"""
+Background health probing and readiness gating
+
+HealthProber checks Twilio and the Sarvam AI endpoints every
+HEALTH_PROBE_INTERVAL seconds in the background and caches the results, so
+health endpoints never do network I/O (or block the event loop) themselves.
+WarmupGate tracks startup steps; the process is ready once all of them
+have finished.
+"""
+
+import os
+import time
+import asyncio
+import aiohttp
+from loguru import logger
+
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+
+
+class WarmupGate:
+    """Named startup steps that must finish before the process reports ready"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.steps = {}
+
+    def register(self, name: str):
+        self.steps[name] = {"done": False, "ok": None, "duration_ms": None, "detail": None}
+
+    def complete(self, name: str, ok: bool = True, detail: str = None):
+        """Mark a step finished; failed steps still count as finished (best effort)"""
+        self.steps[name] = {
+            "done": True,
+            "ok": ok,
+            "duration_ms": round((time.time() - self.started_at) * 1000, 1),
+            "detail": detail,
+        }
+        if ok:
+            logger.info(f"🔥 Warm-up step '{name}' done")
+        else:
+            logger.warning(f"⚠️ Warm-up step '{name}' failed: {detail}")
+
+    @property
+    def ready(self) -> bool:
+        return all(step["done"] for step in self.steps.values())
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready, "steps": dict(self.steps)}
+
+
+class HealthProber:
+    """Periodically runs health checks off the request path and caches the results"""
+
+    def __init__(self, twilio_check, sarvam_urls: dict, interval: float = HEALTH_PROBE_INTERVAL):
+        """
+        Args:
+            twilio_check: blocking callable that raises if Twilio is unreachable
+                (run in a worker thread)
+            sarvam_urls: name -> URL of Sarvam endpoints to check for reachability
+            interval: seconds between probe rounds
+        """
+        self.twilio_check = twilio_check
+        self.sarvam_urls = sarvam_urls
+        self.interval = interval
+        self.results = {}
+        self.rounds = 0
+        self._task = None
+        self._session = None
+        self._first_round = asyncio.Event()
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=HEALTH_PROBE_TIMEOUT))
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def wait_first_round(self):
+        await self._first_round.wait()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"❌ Health probe round failed: {e}")
+            self._first_round.set()
+            await asyncio.sleep(self.interval)
+
+    async def probe_once(self):
+        checks = [self._check("twilio", self._probe_twilio())]
+        for name, url in self.sarvam_urls.items():
+            checks.append(self._check(name, self._probe_url(url)))
+        await asyncio.gather(*checks)
+        self.rounds += 1
+
+    async def _check(self, name: str, probe):
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(probe, timeout=HEALTH_PROBE_TIMEOUT + 1)
+            ok, error = True, None
+        except Exception as e:
+            detail, ok, error = None, False, str(e) or type(e).__name__
+        previous = self.results.get(name)
+        self.results[name] = {
+            "ok": ok,
+            "checked_at": time.time(),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "detail": detail,
+            "error": error,
+        }
+        if previous is not None and previous["ok"] != ok:
+            logger.warning(f"{'✅' if ok else '⚠️'} Health check '{name}' is now {'up' if ok else 'down'}")
+
+    async def _probe_twilio(self):
+        await asyncio.to_thread(self.twilio_check)
+
+    async def _probe_url(self, url: str):
+        """Any HTTP response below 500 means the endpoint is reachable"""
+        async with self._session.head(url, allow_redirects=False) as response:
+            if response.status >= 500:
+                raise RuntimeError(f"HTTP {response.status}")
+            return f"HTTP {response.status}"
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        checks = {}
+        for name, result in self.results.items():
+            checks[name] = dict(result, age_s=round(now - result["checked_at"], 1))
+        return {
+            "rounds": self.rounds,
+            "interval_s": self.interval,
+            "healthy": bool(checks) and all(c["ok"] for c in checks.values()),
+            "checks": checks,
+        }
@@ -0,0 +1,298 @@
+"""
+Fast path for canned intents: answer without the LLM
+
+An Aho-Corasick automaton over every intent pattern (Telugu, Hindi and
+English, since callers mix languages) is built once at startup, and each
+transcript is scanned in a single pass after normalization (NFC, case
+folding, native digits to ASCII, punctuation and zero-width joiners
+removed). A confident match gets the intent's templated reply, which is
+pre-rendered like other fixed phrases, so the turn skips both the LLM and
+TTS round trips.
+
+Patterns match whole words only, so inflected Telugu/Hindi forms are listed
+explicitly (ఆపరేటర్‌తో, not a stem that would also match unrelated words), and
+words with everyday senses are only matched in phrases ("आग लगी", not
+"आग", which is also the start of "आगे"). Patterns negated in the same
+clause are skipped: English negations come before the pattern ("I don't
+want to talk to a person"), Hindi/Telugu ones after it ("... बात नहीं
+करनी"). Clauses end at punctuation and conjunctions ("no power, there are
+sparks" still matches). Intents marked
+alone only match when every other word is one of their patterns or a
+filler ("hello sir", not "hello power cut", which is the whole complaint).
+Check changes against tools/check_intents.py.
+
+The intent table can be replaced or extended with a JSON file
+(INTENT_TABLE_PATH) in the same shape as DEFAULT_INTENTS; an intent set to
+null is removed. Earlier intents win when several match.
+"""
+
+import os
+import re
+import json
+import unicodedata
+from collections import deque
+from loguru import logger
+from phrases import DEFAULT_LANGUAGE, PHRASES
+
+INTENT_TABLE_PATH = os.getenv("INTENT_TABLE_PATH")
+
+NEGATIONS = {
+    "no", "not", "never", "without", "isn't", "isnt", "wasn't", "wasnt", "don't", "dont", "doesn't", "doesnt",
+    "didn't", "didnt",
+}
+TRAILING_NEGATIONS = {"नहीं", "नही", "मत", "లేదు", "వద్దు", "కాదు"}  # Follow the verb in Hindi/Telugu
+CLAUSE_BREAKS = re.compile(r"[,.;:!?।॥]+")
+CLAUSE_WORDS = {"but", "and", "because", "so", "however", "लेकिन", "और", "क्योंकि", "కానీ", "మరియు", "ఎందుకంటే"}
+CLAUSE_MARK = "|"  # Stands for a clause break in normalized text (normalize() never produces it)
+# Words allowed around an intent marked alone (greetings)
+FILLER_WORDS = {
+    "sir", "madam", "ma'am", "ji", "please", "ok", "okay", "yes", "there", "um", "uh", "hmm", "haan",
+    "जी", "हाँ", "हां", "सर", "मैडम", "अच्छा", "అండి", "గారు", "సార్", "మేడం", "అవును",
+}
+
+DEFAULT_INTENTS = {
+    "transfer": {
+        "reply": "transfer",  # Existing phrase key (phrases.PHRASES)
+        "patterns": {
+            "te-IN": ["మానవ ఏజెంట్", "ఆపరేటర్‌తో", "ఆపరేటర్‌కు", "ఆపరేటర్‌కి", "ఏజెంట్‌తో", "ఏజెంట్‌కు",
+                      "వ్యక్తితో మాట్లాడాలి", "మనిషితో మాట్లాడాలి"],
+            "hi-IN": ["मानव एजेंट", "ऑपरेटर से", "एजेंट से", "किसी व्यक्ति से", "किसी इंसान से", "इंसान से बात"],
+            "en-IN": ["human agent", "live agent", "real person", "to a human", "with a human", "to an agent",
+                      "with an agent", "to an operator", "to the operator", "with an operator", "operator please",
+                      "talk to a person", "speak to a person", "talk with a person", "speak with a person",
+                      "talk to someone", "speak to someone", "talk with someone", "speak with someone", "transfer me"],
+        },
+    },
+    "emergency": {
+        "reply": {
+            "te-IN": "విద్యుత్ అత్యవసర పరిస్థితికి వెంటనే 1912 కు కాల్ చేయండి. తెగిపడిన వైర్లకు దూరంగా ఉండండి.",
+            "hi-IN": "बिजली आपातकाल के लिए तुरंत 1912 पर कॉल करें। गिरे हुए तारों से दूर रहें।",
+            "en-IN": "For electrical emergencies, call 1912 right away. Please stay away from fallen wires."
+        },
+        "patterns": {
+            "te-IN": ["అత్యవసరం", "అత్యవసర పరిస్థితి", "ఎమర్జెన్సీ", "కరెంట్ షాక్", "విద్యుత్ షాక్",
+                      "షాక్ కొట్టింది", "మంటలు వచ్చాయి", "మంటలు వస్తున్నాయి", "నిప్పు అంటుకుంది", "తెగిపడింది",
+                      "తెగి పడింది", "నిప్పురవ్వలు", "స్పార్కింగ్", "స్పార్క్స్"],
+            "hi-IN": ["आपातकाल", "आपातकालीन", "इमरजेंसी", "करंट लगा", "करंट लग गया", "करंट का झटका",
+                      "बिजली का झटका", "आग लगी", "आग लग गई", "आग लग गयी", "तार गिरा", "तार गिर गया", "तार टूटकर गिरा",
+                      "चिंगारी", "चिंगारियां", "चिंगारियाँ", "स्पार्किंग"],
+            "en-IN": ["emergency", "electric shock", "current shock", "sparking", "sparks", "caught fire", "on fire",
+                      "catching fire", "wire fell", "fallen wire", "live wire"],
+        },
+    },
+    "lineman_contact": {
+        "reply": {
+            "te-IN": "మీ ప్రాంత లైన్‌మ్యాన్‌ను టోల్ ఫ్రీ నంబర్ 1912 ద్వారా సంప్రదించవచ్చు. దయచేసి మీ సర్వీస్ నంబర్ సిద్ధంగా ఉంచుకోండి.",
+            "hi-IN": "अपने क्षेत्र के लाइनमैन से टोल फ्री नंबर 1912 पर संपर्क करें। कृपया अपना सर्विस नंबर तैयार रखें।",
+            "en-IN": "You can reach your area lineman through the toll-free number 1912. Please keep your service number ready."
+        },
+        "patterns": {
+            "te-IN": ["లైన్‌మ్యాన్ నంబర్", "లైన్‌మ్యాన్ ఫోన్", "లైన్‌మ్యాన్ కాంటాక్ట్", "లైన్మెన్ నంబర్"],
+            "hi-IN": ["लाइनमैन का नंबर", "लाइनमैन नंबर", "लाइनमैन का फोन", "लाइनमैन से संपर्क"],
+            "en-IN": ["lineman number", "lineman's number", "lineman contact", "lineman phone", "contact the lineman",
+                      "contact lineman", "line man number"],
+        },
+    },
+    "greeting": {
+        "reply": {
+            "te-IN": "నమస్కారం! మీ విద్యుత్ సమస్య ఏమిటో చెప్పండి.",
+            "hi-IN": "नमस्ते! बताइए, बिजली से जुड़ी आपकी क्या समस्या है?",
+            "en-IN": "Hello! Please tell me about your electricity issue."
+        },
+        "alone": True,  # Only a bare greeting; "hello, power cut" goes to the LLM
+        "patterns": {
+            "te-IN": ["హలో", "నమస్కారం", "నమస్తే"],
+            "hi-IN": ["नमस्ते", "नमस्कार", "हेलो", "हैलो"],
+            "en-IN": ["hello", "hi", "hey", "good morning", "good afternoon", "good evening", "namaste", "namaskaram"],
+        },
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """Canonical form for matching, padded with spaces so words are bounded on both sides"""
+    chars = []
+    for ch in unicodedata.normalize("NFC", text).casefold():
+        category = unicodedata.category(ch)
+        if category == "Nd":
+            chars.append(str(unicodedata.digit(ch)))  # ౧౯౧౨ / १९१२ -> 1912
+        elif category == "Cf":
+            continue  # Zero-width (non-)joiners vary between transcripts
+        elif category[0] in "PSZC" and ch != "'":
+            chars.append(" ")
+        else:
+            chars.append(ch)
+    return f" {' '.join(''.join(chars).split())} "
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every pattern occurrence in one pass over the text"""
+
+    def __init__(self, patterns: dict):
+        """patterns: normalized pattern -> value reported on match"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                if ch not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][ch] = len(self._goto) - 1
+                node = self._goto[node][ch]
+            self._output[node].append((pattern, value))
+
+        # Breadth-first: failure links point to the longest proper suffix that is also a trie path
+        queue = deque(self._goto[0].values())  # Depth-1 nodes fail to the root
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def find(self, text: str):
+        """Yield (end_index, pattern, value) for every occurrence"""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern, value in self._output[node]:
+                yield i, pattern, value
+
+
+class IntentMatch:
+    __slots__ = ("intent", "pattern", "reply_key")
+
+    def __init__(self, intent: str, pattern: str, reply_key: str):
+        self.intent = intent
+        self.pattern = pattern.strip()
+        self.reply_key = reply_key  # Phrase key of the templated reply
+
+
+class IntentMatcher:
+    """Compiled intent table with per-intent match counts"""
+
+    def __init__(self, intents: dict = DEFAULT_INTENTS):
+        self.intents = {}
+        self._priority = {}
+        patterns = {}
+        for priority, (name, intent) in enumerate(intents.items()):
+            if not intent.get("patterns") or not intent.get("reply"):
+                raise ValueError(f"Intent '{name}' needs patterns and a reply")
+            if isinstance(intent["reply"], str) and intent["reply"] not in PHRASES:
+                raise ValueError(f"Intent '{name}' reply '{intent['reply']}' is not a phrase key ({', '.join(PHRASES)})")
+            if isinstance(intent["reply"], dict) and DEFAULT_LANGUAGE not in intent["reply"]:
+                raise ValueError(f"Intent '{name}' needs a {DEFAULT_LANGUAGE} reply (used when the caller's language is missing)")
+            self.intents[name] = intent
+            self._priority[name] = priority
+            pattern_lists = intent["patterns"]
+            if isinstance(pattern_lists, dict):
+                pattern_lists = [p for language_patterns in pattern_lists.values() for p in language_patterns]
+            for pattern in pattern_lists:
+                normalized = normalize(pattern).strip()
+                if normalized and normalized not in patterns:  # First (highest priority) intent keeps a shared pattern
+                    patterns[normalized] = name
+        self._automaton = AhoCorasick(patterns)
+        self.pattern_count = len(patterns)
+        self.checked = 0
+        self.stats = {name: {"matches": 0, "saved_s": 0.0} for name in self.intents}
+
+    @classmethod
+    def from_env(cls):
+        """Default table, updated from INTENT_TABLE_PATH if set"""
+        intents = dict(DEFAULT_INTENTS)
+        if INTENT_TABLE_PATH:
+            with open(INTENT_TABLE_PATH, encoding="utf-8") as f:
+                for name, intent in json.load(f).items():
+                    if intent is None:
+                        intents.pop(name, None)
+                    else:
+                        intents[name] = intent
+            logger.info(f"🧩 Loaded intent table from {INTENT_TABLE_PATH}")
+        matcher = cls(intents)
+        logger.info(f"🧩 Intent matcher: {len(matcher.intents)} intents, {matcher.pattern_count} patterns")
+        return matcher
+
+    def reply_key(self, name: str) -> str:
+        """Phrase key of an intent's reply: an existing phrase, or intent_<name> for replies given as text"""
+        reply = self.intents[name]["reply"]
+        return reply if isinstance(reply, str) else f"intent_{name}"
+
+    def reply_phrases(self) -> dict:
+        """Intent replies given as text, in phrases.PHRASES shape, so they are pre-rendered with the others"""
+        return {self.reply_key(name): intent["reply"] for name, intent in self.intents.items()
+                if isinstance(intent["reply"], dict)}
+
+    def match(self, transcript: str):
+        """Highest-priority confident intent in the transcript, or None"""
+        self.checked += 1
+        clauses = (normalize(clause).strip() for clause in CLAUSE_BREAKS.split(transcript))
+        text = f" {f' {CLAUSE_MARK} '.join(clause for clause in clauses if clause)} "
+        found = []
+        for end, pattern, name in self._automaton.find(text):
+            start = end - len(pattern) + 1
+            if text[start - 1] != " " or text[end + 1] != " ":
+                continue  # Whole words only ("hi" is not "hindi", "आग" is not "आगे")
+            if self._negated(text, start, end, pattern):
+                continue  # "no sparks", "I do not need an emergency"
+            found.append((start, end, pattern, name))
+        best = None
+        for start, end, pattern, name in found:
+            if self.intents[name].get("alone") and not self._alone(text, name, found):
+                continue
+            if best is None or self._priority[name] < self._priority[best[1]]:
+                best = (pattern, name)
+        if best is None:
+            return None
+        pattern, name = best
+        self.stats[name]["matches"] += 1
+        return IntentMatch(name, pattern, self.reply_key(name))
+
+    @staticmethod
+    def _negated(text: str, start: int, end: int, pattern: str) -> bool:
+        """A negation in the pattern's clause: before English patterns, after Telugu/Hindi ones"""
+        if pattern.isascii():
+            words, negations = reversed(text[:start].split()), NEGATIONS
+        else:
+            words, negations = text[end + 1:].split(), TRAILING_NEGATIONS
+        for word in words:
+            if word == CLAUSE_MARK or word in CLAUSE_WORDS:
+                return False
+            if word in negations:
+                return True
+        return False
+
+    @staticmethod
+    def _alone(text: str, name: str, found: list) -> bool:
+        """Every word outside the intent's own matches is a filler ("hello sir", not "hi no power")"""
+        chars = list(text)
+        for start, end, _, other in found:
+            if other == name:
+                chars[start:end + 1] = " " * (end + 1 - start)
+        return all(word in FILLER_WORDS or word == CLAUSE_MARK for word in "".join(chars).split())
+
+    def record_saved(self, intent: str, seconds: float):
+        """Latency the fast path saved for a matched turn (expected LLM + TTS time it skipped)"""
+        self.stats[intent]["saved_s"] += seconds
+
+    def snapshot(self) -> dict:
+        matched = sum(stat["matches"] for stat in self.stats.values())
+        return {
+            "checked": self.checked,
+            "matched": matched,
+            "match_rate": round(matched / self.checked, 3) if self.checked else 0.0,
+            "intents": {
+                name: {"matches": stat["matches"], "saved_ms": round(stat["saved_s"] * 1000, 1)}
+                for name, stat in self.stats.items()
+            },
+        }
@@ -0,0 +1,202 @@
+"""
+Latency-driven routing between LLM/TTS configurations
+
+Each turn has a latency budget (TURN_BUDGET_MS) from the end of the
+caller's speech to the reply audio. After STT, the router checks what is
+left of the budget against the rolling latency of each configuration tier
+(slowest, best answers first) plus the expected TTS time, and picks the
+best tier that still fits: fewer tokens and a brief reply style, then the
+smaller gemma-4b model with slightly faster speech. A slightly shorter
+answer beats seconds of silence.
+
+Latency samples expire after ROUTER_WINDOW_S. A tier without recent
+samples is estimated from another tier of the same model (the short tier's
+sarvam-m latency, scaled by the priors, is evidence for the full tier),
+then from its last known latency, and only then from its prior, so an
+empty window does not make every call upgrade at once. While a tier's
+estimate is stale, one turn in PROBE_EVERY that would use a faster tier
+tries it instead, so the router notices when the model recovers. A call
+only steps back up to a slower tier when it fits with RECOVERY_MARGIN to
+spare, to avoid flapping.
+"""
+
+import os
+import time
+from collections import deque
+from loguru import logger
+
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "1").lower() not in ("0", "false", "no")
+TURN_BUDGET_MS = int(os.getenv("TURN_BUDGET_MS", "3500"))
+ROUTER_WINDOW_S = float(os.getenv("ROUTER_WINDOW_S", "60"))
+
+RECOVERY_MARGIN = 0.8  # Step back up only when the slower tier fits in 80% of the remaining budget
+MIN_SAMPLES = 3  # Below this, a tier has no fresh estimate
+PROBE_EVERY = 20  # While a slower tier's estimate is stale, every Nth turn tries it
+TTS_PRIOR_MS = 1000
+BRIEF_INSTRUCTION = "Reply in ONE short sentence."
+
+# Best answers first; later tiers trade answer length/quality for latency
+ROUTE_TIERS = (
+    {"name": "full", "model": "sarvam-m", "max_tokens": 100, "brief": False, "tts_pace": 1.0, "prior_ms": 1000},
+    {"name": "short", "model": "sarvam-m", "max_tokens": 60, "brief": True, "tts_pace": 1.0, "prior_ms": 800},
+    {"name": "fast", "model": "gemma-4b", "max_tokens": 60, "brief": True, "tts_pace": 1.1, "prior_ms": 500},
+)
+
+
+class LatencyWindow:
+    """Recent latency samples (seconds) within a sliding time window"""
+
+    def __init__(self, window_s: float = ROUTER_WINDOW_S, max_samples: int = 200):
+        self.window_s = window_s
+        self._samples = deque(maxlen=max_samples)  # (monotonic time, seconds)
+        self.last = None  # Latest known latency (kept after samples expire): the p90, or the newest sample
+
+    def add(self, seconds: float):
+        self._samples.append((time.monotonic(), seconds))
+        estimate = self.estimate()
+        self.last = estimate if estimate is not None else seconds
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.window_s
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def __len__(self) -> int:
+        self._prune()
+        return len(self._samples)
+
+    def estimate(self, fraction: float = 0.9):
+        """Latency percentile in seconds, or None with too few recent samples"""
+        self._prune()
+        if len(self._samples) < MIN_SAMPLES:
+            return None
+        values = sorted(seconds for _, seconds in self._samples)
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Route:
+    """The tier chosen for one turn and the prediction it was chosen on"""
+
+    __slots__ = ("index", "tier", "remaining_s", "baseline_s", "probe")
+
+    def __init__(self, index: int, tier: dict, remaining_s: float, baseline_s: float, probe: bool = False):
+        self.index = index
+        self.tier = tier
+        self.remaining_s = remaining_s  # Budget left for the LLM at decision time
+        self.baseline_s = baseline_s  # Predicted latency of the full tier at decision time
+        self.probe = probe  # Tried to refresh a stale estimate rather than because it was expected to fit
+
+
+class ModelRouter:
+    """Picks an LLM/TTS configuration per turn from rolling upstream latency"""
+
+    def __init__(self, tiers: tuple = ROUTE_TIERS, budget_ms: int = TURN_BUDGET_MS, enabled: bool = MODEL_ROUTING):
+        self.tiers = tiers
+        self.budget = budget_ms / 1000
+        self.enabled = enabled
+        self.llm = {tier["name"]: LatencyWindow() for tier in tiers}
+        self.tts = LatencyWindow()
+        self.decisions = {tier["name"]: 0 for tier in tiers}
+        self.downgrades = 0
+        self.upgrades = 0
+        self.over_budget = 0  # Turns where even the fastest tier was not expected to fit
+        self.llm_over_budget = 0  # Turns where the LLM took longer than the budget left for it
+        self.probes = 0
+        self.saved = 0.0  # Seconds saved vs the full tier's predicted latency, summed
+        self._since_probe = 0
+
+    def _fresh_llm(self, tier: dict):
+        """Estimate from recent samples of this tier, or of another tier of the same model scaled by the priors"""
+        estimate = self.llm[tier["name"]].estimate()
+        if estimate is not None:
+            return estimate
+        for other in self.tiers:
+            if other is not tier and other["model"] == tier["model"]:
+                estimate = self.llm[other["name"]].estimate()
+                if estimate is not None:
+                    return estimate * tier["prior_ms"] / other["prior_ms"]
+        return None
+
+    def predicted_llm(self, tier: dict) -> float:
+        estimate = self._fresh_llm(tier)
+        if estimate is not None:
+            return estimate
+        last = self.llm[tier["name"]].last
+        return last if last is not None else tier["prior_ms"] / 1000
+
+    def predicted_tts(self) -> float:
+        estimate = self.tts.estimate()
+        return estimate if estimate is not None else TTS_PRIOR_MS / 1000
+
+    def route(self, current: int, elapsed_s: float) -> Route:
+        """Choose a tier for this turn; current is the tier the call used last turn"""
+        baseline = self.predicted_llm(self.tiers[0])
+        remaining = self.budget - elapsed_s - self.predicted_tts()
+        if not self.enabled:
+            return Route(0, self.tiers[0], remaining, baseline)
+
+        index = len(self.tiers) - 1
+        for i, tier in enumerate(self.tiers):
+            # Hysteresis: tiers slower than the call's current one must fit with margin to spare
+            limit = remaining * RECOVERY_MARGIN if i < current else remaining
+            if self.predicted_llm(tier) <= limit:
+                index = i
+                break
+        else:
+            self.over_budget += 1
+
+        # Probe: a slower tier known only from expired samples gets an occasional turn to refresh its estimate
+        probe = False
+        self._since_probe += 1
+        stale = [i for i in range(index) if self.llm[self.tiers[i]["name"]].last is not None
+                 and self._fresh_llm(self.tiers[i]) is None]
+        if stale and self._since_probe >= PROBE_EVERY:
+            index, probe = stale[-1], True
+            self._since_probe = 0
+            self.probes += 1
+
+        self.decisions[self.tiers[index]["name"]] += 1
+        if index != current:
+            if index > current:
+                self.downgrades += 1
+            else:
+                self.upgrades += 1
+            logger.info(f"🧭 Routing to '{self.tiers[index]['name']}' tier ({self.tiers[index]['model']}, "
+                        f"{self.tiers[index]['max_tokens']} tokens{', probe' if probe else ''}): "
+                        f"{remaining:.2f}s left for the LLM, full tier expected {baseline:.2f}s")
+        return Route(index, self.tiers[index], remaining, baseline, probe)
+
+    def messages_for(self, route: Route, messages: list) -> list:
+        """Conversation to send for this route (brief tiers ask for a shorter reply; history is not modified)"""
+        if not route.tier["brief"] or not messages or messages[0]["role"] != "system":
+            return messages
+        system = {"role": "system", "content": f"{messages[0]['content']}\n\n{BRIEF_INSTRUCTION}"}
+        return [system] + messages[1:]
+
+    def record_llm(self, route: Route, seconds: float):
+        self.llm[route.tier["name"]].add(seconds)
+        if seconds > route.remaining_s:
+            self.llm_over_budget += 1
+        if route.index > 0:
+            self.saved += max(0.0, route.baseline_s - seconds)
+
+    def record_tts(self, seconds: float):
+        self.tts.add(seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "turn_budget_ms": round(self.budget * 1000),
+            "decisions": dict(self.decisions),
+            "downgrades": self.downgrades,
+            "upgrades": self.upgrades,
+            "over_budget": self.over_budget,
+            "llm_over_budget": self.llm_over_budget,
+            "probes": self.probes,
+            "saved_ms": round(self.saved * 1000, 1),
+            "llm_p90_ms": {
+                name: round(window.estimate() * 1000, 1) if window.estimate() is not None else None
+                for name, window in self.llm.items()
+            },
+            "tts_p90_ms": round(self.tts.estimate() * 1000, 1) if self.tts.estimate() is not None else None,
+        }
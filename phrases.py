@@ -0,0 +1,177 @@
+"""
+Fixed reply phrases and their pre-rendered audio
+
+Phrases that never change (greetings, confirmations, acknowledgements,
+transfer notice, STT fallback) are synthesized once and kept as raw mulaw (8kHz), so speaking
+them costs no TTS round trip. The clips live in a shared memory-mapped
+audio store (audio_store.py) built at deploy time or by the first worker
+to start; every worker maps the same file. Phrases that failed to render
+fall back to live TTS.
+"""
+
+import asyncio
+from loguru import logger
+from audio_utils import wav_to_mulaw
+from audio_store import AUDIO_STORE_PATH, AudioStore, build_lock, write_store
+
+DEFAULT_LANGUAGE = "te-IN"
+
+PHRASES = {
+    "greeting": {
+        "te-IN": "విద్యుత్ శాఖ కస్టమర్ సపోర్ట్‌కు స్వాగతం.",
+        "hi-IN": "बिजली विभाग ग्राहक सहायता में आपका स्वागत है।",
+        "en-IN": "Welcome to Electrical Department Customer Support."
+    },
+    "language_menu": {
+        "te-IN": "తెలుగు కోసం ఒకటి నొక్కండి.",
+        "hi-IN": "हिंदी के लिए 2 दबाएं।",
+        "en-IN": "Press 3 for English."
+    },
+    "language_confirmed": {
+        "te-IN": "తెలుగు. మీకు ఎలా సహాయం చేయగలను?",
+        "hi-IN": "हिंदी। मैं आपकी कैसे मदद कर सकता हूं?",
+        "en-IN": "English. How may I assist you?"
+    },
+    "ack": {
+        "te-IN": "సరే, ఒక్క నిమిషం.",
+        "hi-IN": "ठीक है, एक पल।",
+        "en-IN": "Okay, one moment."
+    },
+    "transfer": {
+        "te-IN": "మానవ ఏజెంట్‌కు కనెక్ట్ చేస్తున్నాను. దయచేసి వేచి ఉండండి.",
+        "hi-IN": "मैं आपको किसी व्यक्ति से जोड़ रहा हूं। कृपया प्रतीक्षा करें।",
+        "en-IN": "Connecting you to a human agent. Please wait."
+    },
+    "stt_fallback": {
+        "te-IN": "క్షమించండి, నేను మీ మాటలు అర్థం చేసుకోలేకపోతున్నాను. మానవ ఏజెంట్‌కు కనెక్ట్ చేయాలా?",
+        "hi-IN": "क्षमा करें, मैं आपकी बात समझ नहीं पा रहा हूं। क्या मैं आपको किसी व्यक्ति से जोड़ूं?",
+        "en-IN": "Sorry, I'm having trouble understanding you. Would you like to speak with a human agent?"
+    },
+}
+
+# In-stream IVR (IVR_MODE=stream): greeting, then each language's menu line
+LANGUAGE_MENU = (("greeting", "en-IN"), ("language_menu", "te-IN"), ("language_menu", "hi-IN"), ("language_menu", "en-IN"))
+LANGUAGE_MENU_RETRY = LANGUAGE_MENU[1:]
+
+
+class PhraseCache:
+    """Pre-rendered mulaw audio for PHRASES, keyed by (phrase, language)"""
+
+    def __init__(self, phrases: dict = PHRASES, store_path: str = AUDIO_STORE_PATH):
+        """
+        Args:
+            phrases: phrase key -> language -> text
+            store_path: shared audio store file; empty keeps clips in process memory only
+        """
+        self.phrases = phrases
+        self.store_path = store_path
+        self.store = None
+        self._audio = {}  # Clips held in memory when the store is disabled or unwritable
+        self._joined = {}  # Concatenated clip sequences (e.g. the language menu)
+
+    @property
+    def total(self) -> int:
+        return sum(len(texts) for texts in self.phrases.values())
+
+    @property
+    def rendered(self) -> int:
+        return sum(
+            1 for key, texts in self.phrases.items() for language in texts
+            if self.audio(key, language) is not None
+        )
+
+    def text(self, key: str, language: str) -> str:
+        texts = self.phrases[key]
+        return texts.get(language, texts[DEFAULT_LANGUAGE])
+
+    def audio(self, key: str, language: str):
+        """Cached mulaw for a phrase, or None if it has not been rendered"""
+        if self.store is not None:
+            return self.store.get(key, language)
+        return self._audio.get((key, language))
+
+    def joined(self, parts: tuple):
+        """One mulaw clip of several (key, language) phrases in order, or None if any is missing"""
+        if parts not in self._joined:
+            clips = [self.audio(key, language) for key, language in parts]
+            if any(clip is None for clip in clips):
+                return None
+            self._joined[parts] = b"".join(clips)
+        return self._joined[parts]
+
+    def _missing(self, store) -> list:
+        """(key, language, text) of phrases the store lacks or holds stale audio for"""
+        return [
+            (key, language, text)
+            for key, texts in self.phrases.items()
+            for language, text in texts.items()
+            if store is None or not store.has(key, language, text)
+        ]
+
+    async def _render(self, sarvam, phrases: list, concurrency: int) -> dict:
+        """TTS each (key, language, text); returns (key, language) -> mulaw for the ones that worked"""
+        semaphore = asyncio.Semaphore(concurrency)
+        clips = {}
+
+        async def render(key, language, text):
+            async with semaphore:
+                wav = await sarvam.text_to_speech(text, language)
+            mulaw = wav_to_mulaw(wav) if wav else b""
+            if mulaw:
+                clips[(key, language)] = mulaw
+            else:
+                logger.warning(f"⚠️ Could not pre-render phrase '{key}' ({language})")
+
+        await asyncio.gather(*(render(*phrase) for phrase in phrases))
+        return clips
+
+    async def warm_up(self, sarvam, concurrency: int = 4, rebuild: bool = False) -> int:
+        """Map the audio store, rendering missing or stale phrases first; returns how many are cached"""
+        if not self.store_path:
+            self._audio = await self._render(sarvam, self._missing(None), concurrency)
+            logger.info(f"🗂️ Phrase cache: {len(self._audio)}/{self.total} phrases rendered")
+            return len(self._audio)
+
+        try:
+            store = None if rebuild else self._open_store(sarvam.tts_url)
+            if store is None or self._missing(store):
+                async with build_lock(self.store_path):
+                    # Another worker may have built the store while we waited for the lock
+                    store = None if rebuild else self._open_store(sarvam.tts_url)
+                    missing = self._missing(store)
+                    if missing:
+                        store = await self._build(sarvam, store, missing, concurrency)
+        except OSError as e:
+            logger.warning(f"⚠️ Audio store {self.store_path} unavailable: {e}; keeping phrases in memory")
+            store = None
+            self._audio = await self._render(sarvam, self._missing(None), concurrency)
+        if store is not None:
+            self.store = store
+        self._joined.clear()
+        logger.info(f"🗂️ Phrase cache: {self.rendered}/{self.total} phrases ready"
+                    f"{f' (store {self.store_path})' if self.store else ''}")
+        return self.rendered
+
+    def _open_store(self, source: str):
+        """The existing store, unless it is missing or was rendered by a different TTS endpoint"""
+        store = AudioStore.open(self.store_path)
+        return store if store is not None and store.source == source else None
+
+    async def _build(self, sarvam, store, missing: list, concurrency: int):
+        """Render missing phrases and rewrite the store; returns the new store (None if it could not be written)"""
+        logger.info(f"🗂️ Rendering {len(missing)} phrases into the audio store")
+        rendered = await self._render(sarvam, missing, concurrency)
+        clips = {}
+        for key, texts in self.phrases.items():
+            for language, text in texts.items():
+                if (key, language) in rendered:
+                    clips[(key, language)] = (text, rendered[(key, language)])
+                elif store is not None and store.has(key, language, text):
+                    clips[(key, language)] = (text, bytes(store.get(key, language)))
+        try:
+            write_store(self.store_path, clips, source=sarvam.tts_url)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write audio store {self.store_path}: {e}; keeping phrases in memory")
+            self._audio = {name: mulaw for name, (text, mulaw) in clips.items()}
+            return None
+        return AudioStore.open(self.store_path)
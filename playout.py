@@ -0,0 +1,230 @@
+"""
+Outbound audio playout to Twilio media streams
+
+Two modes, selected with PLAYOUT_MODE:
+
+- paced (default): 160-byte (20ms) media messages, sent in real time
+- bulk: large chunks (PLAYOUT_CHUNK_MS, default 1000ms) sent back to back,
+  each followed by a `mark` message. Twilio buffers the audio and echoes
+  every mark when playback reaches it, so PlaybackTracker knows how much of
+  the reply the caller has actually heard.
+
+Latency masking (MASK_DELAY_MS, off by default): if a reply is not ready
+that long after the caller stops speaking, a short pre-rendered
+acknowledgement clip is played ("okay, one moment"). It is armed once STT
+has returned a transcript, so turns that get no reply stay silent. The reply cuts in by
+stopping the clip at the next frame and clearing Twilio's queue.
+"""
+
+import os
+import json
+import time
+import asyncio
+from loguru import logger
+from audio_utils import encode_mulaw_base64
+
+PLAYOUT_MODE = os.getenv("PLAYOUT_MODE", "paced").lower()
+PLAYOUT_CHUNK_MS = int(os.getenv("PLAYOUT_CHUNK_MS", "1000"))
+MASK_DELAY_MS = int(os.getenv("MASK_DELAY_MS", "0"))  # 0 disables latency masking
+
+FRAME_BYTES = 160  # 20ms at 8kHz mulaw
+
+
+class PlaybackTracker:
+    """Tracks reply playback on the caller's side from Twilio mark echoes"""
+
+    def __init__(self):
+        self.reply_count = 0
+        self.reply_bytes = 0  # Size of the current reply
+        self.heard_bytes = 0  # Bytes of the current reply confirmed played
+        self._pending = {}  # mark name -> reply byte offset reached when echoed
+
+    @property
+    def is_playing(self) -> bool:
+        """True while Twilio still has unplayed audio from the current reply"""
+        return bool(self._pending)
+
+    def start_reply(self, total_bytes: int):
+        self.reply_count += 1
+        self.reply_bytes = total_bytes
+        self.heard_bytes = 0
+        self._pending.clear()
+
+    def add_mark(self, end_offset: int) -> str:
+        """Register a mark placed after end_offset bytes of the reply"""
+        name = f"r{self.reply_count}-{end_offset}"
+        self._pending[name] = end_offset
+        return name
+
+    def on_mark(self, name: str) -> bool:
+        """Handle a mark echo; returns False for marks of cleared or older replies"""
+        offset = self._pending.pop(name, None)
+        if offset is None:
+            return False
+        self.heard_bytes = max(self.heard_bytes, offset)
+        return True
+
+    def interrupt(self) -> float:
+        """Forget unplayed marks (after a clear); returns the fraction of the reply heard"""
+        self._pending.clear()
+        if not self.reply_bytes:
+            return 1.0
+        return min(1.0, self.heard_bytes / self.reply_bytes)
+
+
+async def send_clear(websocket, stream_sid: str):
+    """Ask Twilio to drop any queued audio"""
+    try:
+        await websocket.send_text(json.dumps({"event": "clear", "streamSid": stream_sid}))
+    except Exception as clear_error:
+        logger.warning(f"⚠️ Failed to clear audio queue: {clear_error}")
+
+
+async def send_paced(websocket, stream_sid: str, mulaw: bytes) -> int:
+    """Send audio in real-time 20ms chunks; returns messages sent"""
+    sent = 0
+    for i in range(0, len(mulaw), FRAME_BYTES):
+        # Check if WebSocket is still connected
+        if websocket.client_state.name != "CONNECTED":
+            logger.warning("⚠️ WebSocket disconnected, stopping audio send")
+            break
+
+        media_msg = {
+            "event": "media",
+            "streamSid": stream_sid,
+            "media": {"payload": encode_mulaw_base64(mulaw[i:i + FRAME_BYTES])}
+        }
+
+        try:
+            await websocket.send_text(json.dumps(media_msg))
+            sent += 1
+            await asyncio.sleep(0.02)  # 20ms delay
+        except Exception as send_error:
+            logger.warning(f"⚠️ Failed to send audio chunk: {send_error}")
+            break
+    return sent
+
+
+async def send_bulk(websocket, stream_sid: str, mulaw: bytes, tracker: PlaybackTracker) -> int:
+    """Queue the whole reply on Twilio in large chunks, each followed by a mark; returns messages sent"""
+    chunk_size = max(FRAME_BYTES, PLAYOUT_CHUNK_MS * 8 // FRAME_BYTES * FRAME_BYTES)
+    tracker.start_reply(len(mulaw))
+    sent = 0
+    for i in range(0, len(mulaw), chunk_size):
+        if websocket.client_state.name != "CONNECTED":
+            logger.warning("⚠️ WebSocket disconnected, stopping audio send")
+            break
+
+        chunk = mulaw[i:i + chunk_size]
+        media_msg = {
+            "event": "media",
+            "streamSid": stream_sid,
+            "media": {"payload": encode_mulaw_base64(chunk)}
+        }
+        mark_msg = {
+            "event": "mark",
+            "streamSid": stream_sid,
+            "mark": {"name": tracker.add_mark(i + len(chunk))}
+        }
+
+        try:
+            await websocket.send_text(json.dumps(media_msg))
+            await websocket.send_text(json.dumps(mark_msg))
+            sent += 2
+        except Exception as send_error:
+            logger.warning(f"⚠️ Failed to send audio chunk: {send_error}")
+            break
+    return sent
+
+
+def truncate_to_heard(text: str, fraction: float) -> str:
+    """Cut reply text to roughly the part the caller heard before interrupting"""
+    if fraction >= 1.0:
+        return text
+    cut = text[:int(len(text) * fraction)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + "…"
+
+
+class MaskingStats:
+    """Process-wide counters for latency masking"""
+
+    def __init__(self, delay_ms: int = MASK_DELAY_MS):
+        self.delay_ms = delay_ms
+        self.turns = 0  # Turns that waited for a reply with masking enabled
+        self.fired = 0  # Turns where the acknowledgement clip started
+        self.cut_in = 0  # Clips stopped early because the reply was ready
+        self.no_clip = 0  # Turns with no pre-rendered clip for the language
+        self.masked_wait = 0.0  # Seconds from clip start to reply ready, summed
+
+    @property
+    def enabled(self) -> bool:
+        return self.delay_ms > 0
+
+    def start(self, websocket, stream_sid: str, clip, elapsed_s: float = 0.0):
+        """Arm masking for one turn (elapsed_s: time since the turn ended); returns a LatencyMask,
+        or None when disabled or no clip is cached"""
+        if not self.enabled:
+            return None
+        self.turns += 1
+        if not clip:
+            self.no_clip += 1
+            return None
+        return LatencyMask(websocket, stream_sid, clip, self, elapsed_s)
+
+    def snapshot(self) -> dict:
+        return {
+            "delay_ms": self.delay_ms,
+            "turns": self.turns,
+            "fired": self.fired,
+            "fire_rate": round(self.fired / self.turns, 3) if self.turns else 0.0,
+            "cut_in": self.cut_in,
+            "no_clip": self.no_clip,
+            "mean_masked_wait_ms": round(self.masked_wait / self.fired * 1000, 1) if self.fired else 0.0,
+        }
+
+
+class LatencyMask:
+    """Acknowledgement clip for one turn, played if the reply is not ready after the delay"""
+
+    def __init__(self, websocket, stream_sid: str, clip, stats: MaskingStats, elapsed_s: float = 0.0):
+        self.websocket = websocket
+        self.stream_sid = stream_sid
+        self.stats = stats
+        self.fired_at = None
+        self.finished = False
+        self._task = asyncio.create_task(self._run(clip, max(0.0, stats.delay_ms / 1000 - elapsed_s)))
+
+    @property
+    def fired(self) -> bool:
+        return self.fired_at is not None
+
+    async def _run(self, clip, delay: float):
+        await asyncio.sleep(delay)
+        self.fired_at = time.monotonic()
+        self.stats.fired += 1
+        logger.info(f"⏳ Reply not ready after {self.stats.delay_ms}ms, playing acknowledgement")
+        # Paced even in bulk mode: nothing queues up at Twilio, so the reply can cut in at any frame
+        await send_paced(self.websocket, self.stream_sid, clip)
+        self.finished = True
+
+    async def stop(self):
+        """Stop the clip so the reply (or silence) can take over"""
+        if not self._task.done():
+            self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ Acknowledgement clip failed: {e}")
+        if self.fired:
+            self.stats.masked_wait += time.monotonic() - self.fired_at
+            if not self.finished:
+                self.stats.cut_in += 1
+                await send_clear(self.websocket, self.stream_sid)
+
+    def abort(self):
+        """Cancel without touching the WebSocket (connection is closing)"""
+        self._task.cancel()
@@ -5,8 +5,18 @@ Sarvam AI integration for STT, LLM, and TTS
 import os
 import asyncio
 import aiohttp
+import time
 import base64
+from urllib.parse import urlsplit
 from loguru import logger
+from capacity import UpstreamLimiter, UpstreamOverloaded
+
+SARVAM_POOL_SIZE = int(os.getenv("SARVAM_POOL_SIZE", "100"))  # Max open connections per process
+# Max concurrent requests per endpoint per process (excess requests queue, see capacity.py)
+SARVAM_STT_CONCURRENCY = int(os.getenv("SARVAM_STT_CONCURRENCY", "20"))
+SARVAM_LLM_CONCURRENCY = int(os.getenv("SARVAM_LLM_CONCURRENCY", "20"))
+SARVAM_TTS_CONCURRENCY = int(os.getenv("SARVAM_TTS_CONCURRENCY", "20"))
+RETRY_COUNT = 2  # Attempts per STT/LLM/TTS request (tools/mock_sarvam.py replays failures this many times)
 
 
 class SarvamAI:
@@ -22,23 +32,60 @@ class SarvamAI:
         self.llm_url = os.getenv("SARVAM_LLM_URL", "https://api.sarvam.ai/v1/chat/completions")
         self.session = None
         self._session_lock = False
+        self.limiters = {
+            "stt": UpstreamLimiter("stt", SARVAM_STT_CONCURRENCY),
+            "llm": UpstreamLimiter("llm", SARVAM_LLM_CONCURRENCY),
+            "tts": UpstreamLimiter("tts", SARVAM_TTS_CONCURRENCY),
+        }
     
     async def get_session(self):
-        """Get or create aiohttp session with proper error handling"""
+        """Get or create aiohttp session with proper error handling
+        
+        The session (and its connection pool) is shared by all calls in the process,
+        so TLS connections and DNS lookups are reused across turns and calls.
+        """
         try:
             if self.session is None or self.session.closed:
                 self.session = aiohttp.ClientSession(
                     headers={
                         "API-Subscription-Key": self.api_key
                     },
-                    timeout=aiohttp.ClientTimeout(total=30)
+                    timeout=aiohttp.ClientTimeout(total=30),
+                    connector=aiohttp.TCPConnector(
+                        limit=SARVAM_POOL_SIZE,
+                        ttl_dns_cache=300,  # Cache DNS for 5 minutes
+                        keepalive_timeout=60  # Keep warm connections around between turns
+                    )
                 )
             return self.session
         except Exception as e:
             logger.error(f"❌ Failed to create aiohttp session: {e}")
             raise
     
-    async def speech_to_text(self, audio_bytes: bytes, language: str = None, retry_count: int = 2) -> tuple:
+    async def warm_up(self) -> dict:
+        """Open pooled connections to every Sarvam host (DNS + TCP + TLS) ahead of the first call
+        Returns: {host: latency_ms or None on failure}
+        """
+        session = await self.get_session()
+        results = {}
+        
+        async def connect(url):
+            host = urlsplit(url).netloc
+            start = time.perf_counter()
+            try:
+                async with session.head(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                    await response.read()
+                results[host] = round((time.perf_counter() - start) * 1000, 1)
+            except Exception as e:
+                logger.warning(f"⚠️ Sarvam warm-up failed for {host}: {e}")
+                results[host] = None
+        
+        # One request per host is enough to resolve DNS and keep a connection in the pool
+        urls = {urlsplit(url).netloc: url for url in (self.stt_url, self.llm_url, self.tts_url)}
+        await asyncio.gather(*(connect(url) for url in urls.values()))
+        return results
+    
+    async def speech_to_text(self, audio_bytes: bytes, language: str = None, retry_count: int = RETRY_COUNT) -> tuple:
         """Convert speech to text with language detection and retry logic
         Returns: (text, detected_language)
         """
@@ -69,7 +116,7 @@ class SarvamAI:
                         data.add_field('language_code', lang)
                         data.add_field('model', 'saarika:v2')
                         
-                        async with session.post(self.stt_url, data=data, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                        async with self.limiters["stt"].slot(), session.post(self.stt_url, data=data, timeout=aiohttp.ClientTimeout(total=15)) as response:
                             if response.status == 200:
                                 result = await response.json()
                                 text = result.get("transcript", "")
@@ -93,6 +140,8 @@ class SarvamAI:
                     except asyncio.TimeoutError:
                         logger.warning(f"⏱️ STT timeout for {lang}")
                         continue
+                    except UpstreamOverloaded:
+                        raise
                     except Exception as lang_error:
                         logger.warning(f"⚠️ STT error for {lang}: {lang_error}")
                         continue
@@ -114,6 +163,10 @@ class SarvamAI:
                         continue
                     return "", default_language
             
+            except UpstreamOverloaded as e:
+                # Retrying would only add load to a saturated queue
+                logger.warning(f"🚦 STT overloaded: {e}")
+                return "", default_language
             except Exception as e:
                 logger.error(f"❌ STT exception (attempt {attempt + 1}/{retry_count}): {e}")
                 if attempt < retry_count - 1:
@@ -123,17 +176,17 @@ class SarvamAI:
         
         return "", default_language
     
-    async def chat(self, messages: list, retry_count: int = 2) -> str:
-        """Get LLM response with retry logic"""
+    async def chat(self, messages: list, retry_count: int = RETRY_COUNT, model: str = "sarvam-m", max_tokens: int = 100) -> str:
+        """Get LLM response with retry logic (model/max_tokens are chosen per turn by model_router.py)"""
         for attempt in range(retry_count):
             try:
                 session = await self.get_session()
                 
                 payload = {
-                    "model": "sarvam-m",  # Valid model: sarvam-m, gemma-4b, or gemma-12b
+                    "model": model,  # Valid model: sarvam-m, gemma-4b, or gemma-12b
                     "messages": messages,
                     "temperature": 0.5,  # Lower temperature for more focused, consistent responses
-                    "max_tokens": 100,  # Balanced length for voice calls (2-3 sentences)
+                    "max_tokens": max_tokens,  # 100 is balanced for voice calls (2-3 sentences)
                     "top_p": 0.85,  # Slightly lower for more deterministic responses
                     "frequency_penalty": 0.3,  # Reduce repetitive responses
                     "presence_penalty": 0.2  # Encourage diverse vocabulary
@@ -145,7 +198,7 @@ class SarvamAI:
                     "Content-Type": "application/json"
                 }
                 
-                async with session.post(self.llm_url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                async with self.limiters["llm"].slot(), session.post(self.llm_url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
                     if response.status == 200:
                         result = await response.json()
                         text = result["choices"][0]["message"]["content"]
@@ -166,6 +219,9 @@ class SarvamAI:
                     await asyncio.sleep(0.5)
                     continue
                 return "Sorry, I'm taking too long to respond."
+            except UpstreamOverloaded as e:
+                logger.warning(f"🚦 LLM overloaded: {e}")
+                return "Sorry, I'm taking too long to respond."
             except Exception as e:
                 logger.error(f"LLM exception (attempt {attempt + 1}/{retry_count}): {e}")
                 if attempt < retry_count - 1:
@@ -176,7 +232,7 @@ class SarvamAI:
         return "Sorry, I encountered an error."
     
 
-    async def text_to_speech(self, text: str, language: str = "hi-IN", retry_count: int = 2) -> bytes:
+    async def text_to_speech(self, text: str, language: str = "hi-IN", retry_count: int = RETRY_COUNT, pace: float = 1.0) -> bytes:
         """Convert text to speech with retry logic"""
         for attempt in range(retry_count):
             try:
@@ -187,7 +243,7 @@ class SarvamAI:
                     "target_language_code": language,
                     "speaker": "anushka",  # Valid speaker from API
                     "pitch": 0,
-                    "pace": 1.0,
+                    "pace": pace,
                     "loudness": 1.5,
                     "speech_sample_rate": 8000,  # 8kHz for Twilio
                     "enable_preprocessing": True,
@@ -196,7 +252,7 @@ class SarvamAI:
                 
                 headers = {"Content-Type": "application/json"}
                 
-                async with session.post(self.tts_url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=20)) as response:
+                async with self.limiters["tts"].slot(), session.post(self.tts_url, json=payload, headers=headers, timeout=aiohttp.ClientTimeout(total=20)) as response:
                     if response.status == 200:
                         result = await response.json()
                         audio_base64 = result["audios"][0]
@@ -218,6 +274,9 @@ class SarvamAI:
                     await asyncio.sleep(0.5)
                     continue
                 return b""
+            except UpstreamOverloaded as e:
+                logger.warning(f"🚦 TTS overloaded: {e}")
+                return b""
             except Exception as e:
                 logger.error(f"TTS exception (attempt {attempt + 1}/{retry_count}): {e}")
                 if attempt < retry_count - 1:
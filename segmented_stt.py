@@ -0,0 +1,178 @@
+"""
+Segmented STT for long utterances
+
+A turn longer than STT_SEGMENT_MS is cut into segments while the caller is
+still speaking. Each cut is placed at the latest pause the VAD saw in the
+last SPLIT_SEARCH_MS before the segment length (the VAD drops silence from
+the buffer, so pauses are recorded as offsets where speech resumed). Without
+one, the cut falls back to the quietest 20ms frame in that window. The next
+segment starts STT_SEGMENT_OVERLAP_MS before the cut, so a word split there
+is heard whole in at least one segment. Completed segments are transcribed concurrently
+while the caller keeps talking; when the turn ends only the last segment is
+still outstanding, so the transcript is ready about one segment's STT
+latency after the caller stops. Transcripts are joined in order, dropping
+words repeated across the overlap, at most as many as the overlap can hold
+(about 250ms per word), so a caller repeating a digit keeps both.
+
+Only the segment being captured is buffered. MAX_TURN_MS (call_session.py)
+bounds the whole turn.
+"""
+
+import os
+import math
+import time
+import audioop
+import asyncio
+from loguru import logger
+from audio_utils import mulaw_to_wav
+from intent_matcher import normalize
+
+STT_SEGMENT_MS = int(os.getenv("STT_SEGMENT_MS", "5000"))  # 0 = one STT request per turn
+STT_SEGMENT_OVERLAP_MS = int(os.getenv("STT_SEGMENT_OVERLAP_MS", "400"))
+
+SPLIT_SEARCH_MS = 1500  # Window before the segment length searched for a cut point
+PAUSE_MIN_MS = 100  # Shortest silence recorded as a pause (shorter dips can be inside a word)
+MIN_SEGMENT_ADVANCE_MS = 1000  # Each segment must move the turn forward by at least this much
+
+if STT_SEGMENT_OVERLAP_MS < 0:
+    logger.warning(f"⚠️ STT_SEGMENT_OVERLAP_MS={STT_SEGMENT_OVERLAP_MS} is negative, using 0")
+    STT_SEGMENT_OVERLAP_MS = 0
+if STT_SEGMENT_MS and STT_SEGMENT_MS < STT_SEGMENT_OVERLAP_MS + SPLIT_SEARCH_MS + MIN_SEGMENT_ADVANCE_MS:
+    # Otherwise the overlap eats the segment: the buffer barely shrinks and a new STT request starts every frame
+    minimum = STT_SEGMENT_OVERLAP_MS + SPLIT_SEARCH_MS + MIN_SEGMENT_ADVANCE_MS
+    logger.warning(f"⚠️ STT_SEGMENT_MS={STT_SEGMENT_MS} is too short for a {STT_SEGMENT_OVERLAP_MS}ms overlap, using {minimum}")
+    STT_SEGMENT_MS = minimum
+
+OVERLAP_MAX_WORDS = max(1, math.ceil(STT_SEGMENT_OVERLAP_MS / 250))  # Words the overlap can hold; longer runs are real repeats
+BYTES_PER_MS = 8  # mulaw, 8kHz
+FRAME_BYTES = 160  # 20ms
+
+SEGMENT_BYTES = STT_SEGMENT_MS * BYTES_PER_MS
+OVERLAP_BYTES = STT_SEGMENT_OVERLAP_MS * BYTES_PER_MS
+PAUSE_MIN_BYTES = PAUSE_MIN_MS * BYTES_PER_MS
+
+
+def quietest_cut(buffer: bytearray, start: int, end: int) -> int:
+    """Offset in the middle of the lowest-energy frame between start and end (latest on ties)"""
+    best, best_rms = end, None
+    for offset in range(start, end - FRAME_BYTES + 1, FRAME_BYTES):
+        rms = audioop.rms(audioop.ulaw2lin(bytes(buffer[offset:offset + FRAME_BYTES]), 2), 2)
+        if best_rms is None or rms <= best_rms:
+            best, best_rms = offset + FRAME_BYTES // 2, rms
+    return best
+
+
+def _overlap_words(previous: list, following: list) -> int:
+    """How many leading words of `following` repeat the end of `previous`"""
+    tail = [normalize(word).strip() for word in previous[-OVERLAP_MAX_WORDS:]]
+    head = [normalize(word).strip() for word in following[:OVERLAP_MAX_WORDS]]
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k]:
+            return k
+        if k < OVERLAP_MAX_WORDS and tail[-k:] == head[1:k + 1] and (k >= 2 or (len(tail) > k and tail[-k - 1].endswith(head[0]))):
+            return k + 1  # First word is a fragment of the word cut at the start of the overlap
+    return 0
+
+
+def stitch(transcripts: list) -> tuple:
+    """Join segment transcripts in order; returns (text, number of repeated words dropped)"""
+    words, dropped = [], 0
+    for text in transcripts:
+        following = (text or "").split()
+        repeated = _overlap_words(words, following) if words else 0
+        words.extend(following[repeated:])
+        dropped += repeated
+    return " ".join(words), dropped
+
+
+class SegmentStats:
+    """Process-wide counters for segmented turns, for /metrics"""
+
+    def __init__(self):
+        self.turns = 0
+        self.segments = 0
+        self.pause_cuts = 0  # Segments cut at a recorded pause rather than the quietest frame
+        self.dropped_words = 0
+        self.failed_segments = 0
+        self.tail_wait = 0.0  # End of speech to stitched transcript, summed
+
+    def snapshot(self) -> dict:
+        return {
+            "segment_ms": STT_SEGMENT_MS,
+            "overlap_ms": STT_SEGMENT_OVERLAP_MS,
+            "segmented_turns": self.turns,
+            "segments": self.segments,
+            "pause_cuts": self.pause_cuts,
+            "failed_segments": self.failed_segments,
+            "dropped_overlap_words": self.dropped_words,
+            "mean_tail_wait_ms": round(self.tail_wait / self.turns * 1000, 1) if self.turns else 0.0,
+        }
+
+
+class SegmentedSTT:
+    """Segments of one long turn, transcribed while the caller keeps talking"""
+
+    def __init__(self, sarvam, language: str, stats: SegmentStats, recorder=None):
+        self.sarvam = sarvam
+        self.language = language
+        self.stats = stats
+        self.recorder = recorder
+        self.tasks = []  # STT per segment, in order
+        self.captured = 0  # Bytes of the turn already sent to STT, not counting overlap
+        self.overlap = 0  # Bytes at the start of the buffer repeated from the previous segment
+
+    def split(self, buffer: bytearray, pauses: list):
+        """Send the completed segment at the front of the buffer to STT, keeping the overlap and the rest
+
+        pauses: ascending buffer offsets where the caller paused, shifted in place as the buffer is trimmed
+        """
+        search_start = max(SEGMENT_BYTES - SPLIT_SEARCH_MS * BYTES_PER_MS, self.overlap + FRAME_BYTES)
+        in_window = [offset for offset in pauses if search_start <= offset <= SEGMENT_BYTES]
+        if in_window:
+            cut = in_window[-1]
+            self.stats.pause_cuts += 1
+        else:
+            cut = quietest_cut(buffer, search_start, SEGMENT_BYTES)
+        self._send(bytes(buffer[:cut]))
+        self.captured += cut - self.overlap
+        self.overlap = min(OVERLAP_BYTES, cut)
+        trimmed = cut - self.overlap
+        del buffer[:trimmed]
+        pauses[:] = [offset - trimmed for offset in pauses if offset - trimmed > self.overlap]
+
+    def _send(self, segment: bytes):
+        index = len(self.tasks)
+        logger.info(f"✂️ STT segment {index + 1}: {len(segment)} bytes")
+        self.tasks.append(asyncio.create_task(self._transcribe(index, mulaw_to_wav(segment))))
+
+    async def _transcribe(self, index: int, wav: bytes) -> str:
+        start = asyncio.get_event_loop().time()
+        try:
+            text, _ = await self.sarvam.speech_to_text(wav, language=self.language)
+        except Exception as e:
+            logger.error(f"❌ STT segment {index + 1} failed: {e}")
+            text = ""
+        duration = asyncio.get_event_loop().time() - start
+        if not text:
+            self.stats.failed_segments += 1
+        if self.recorder:
+            self.recorder.upstream("stt", start, duration, transcript=text, segment=index)
+        return text
+
+    async def finish(self, rest: bytes) -> str:
+        """Transcribe the end of the turn and join every segment's transcript"""
+        started = time.monotonic()
+        if len(rest) > self.overlap:
+            self._send(rest)
+        transcripts = await asyncio.gather(*self.tasks)
+        text, dropped = stitch(transcripts)
+        self.stats.turns += 1
+        self.stats.segments += len(self.tasks)
+        self.stats.dropped_words += dropped
+        self.stats.tail_wait += time.monotonic() - started
+        logger.info(f"🧵 Stitched {len(self.tasks)} segments ({dropped} repeated words dropped)")
+        return text
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
@@ -0,0 +1,127 @@
+"""
+Startup-time benchmark
+
+Starts the server as a fresh process (as Render does) several times and
+measures the time from process spawn until /livez and /readyz answer 200,
+plus the duration of each warm-up step. Sarvam AI is replaced by
+tools/mock_sarvam.py so results only reflect our own startup path
+(pass --real-sarvam to use the configured endpoints).
+
+Usage:
+    python tools/bench_startup.py --runs 5
+    python tools/bench_startup.py --runs 10 --json startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aiohttp
+from mock_sarvam import MockSarvam
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_200(session, url: str, deadline: float):
+    while time.perf_counter() < deadline:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return await response.json()
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.01)
+    raise TimeoutError(f"{url} not ready in time")
+
+
+async def one_run(env: dict, timeout: float) -> dict:
+    port = free_port()
+    run_env = dict(env, PORT=str(port), ENVIRONMENT="production")
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "twilio_server.py", cwd=ROOT, env=run_env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=2)) as session:
+            deadline = start + timeout
+            await wait_for_200(session, f"http://127.0.0.1:{port}/livez", deadline)
+            live_s = time.perf_counter() - start
+            ready = await wait_for_200(session, f"http://127.0.0.1:{port}/readyz", deadline)
+            ready_s = time.perf_counter() - start
+    finally:
+        process.terminate()
+        await process.wait()
+    steps = {name: step["duration_ms"] for name, step in ready["warmup"]["steps"].items()}
+    return {"live_s": round(live_s, 3), "ready_s": round(ready_s, 3), "warmup_steps_ms": steps}
+
+
+def summarize(values: list) -> dict:
+    return {"min": min(values), "median": round(statistics.median(values), 3), "max": max(values)}
+
+
+async def bench(runs: int, real_sarvam: bool, timeout: float) -> dict:
+    env = dict(os.environ)
+    for var in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_PHONE_NUMBER", "SARVAM_API_KEY"):
+        env.setdefault(var, "bench")
+    env.setdefault("HEALTH_PROBE_TIMEOUT", "2")
+    # First run builds the audio store, later runs map it (as after a deploy-time build)
+    env["AUDIO_STORE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-startup-"), "audio_store.bin")
+    mock = None
+    if not real_sarvam:
+        mock = MockSarvam(speed=0)
+        await mock.start()
+        env.update(mock.env())
+    try:
+        results = []
+        for i in range(runs):
+            result = await one_run(env, timeout)
+            print(f"run {i + 1}: live {result['live_s']:.3f}s, ready {result['ready_s']:.3f}s "
+                  f"steps {result['warmup_steps_ms']}")
+            results.append(result)
+    finally:
+        if mock:
+            await mock.stop()
+    return {
+        "runs": runs,
+        "mock_sarvam": not real_sarvam,
+        "live_s": summarize([r["live_s"] for r in results]),
+        "ready_s": summarize([r["ready_s"] for r in results]),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark server startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for readiness per run")
+    parser.add_argument("--real-sarvam", action="store_true", help="Warm up against the configured Sarvam endpoints")
+    parser.add_argument("--json", help="Write results to this file (for tracking over time)")
+    args = parser.parse_args()
+
+    report = asyncio.run(bench(args.runs, args.real_sarvam, args.timeout))
+    print(f"\nTime to live:  median {report['live_s']['median']:.3f}s "
+          f"(min {report['live_s']['min']:.3f}s, max {report['live_s']['max']:.3f}s)")
+    print(f"Time to ready: median {report['ready_s']['median']:.3f}s "
+          f"(min {report['ready_s']['min']:.3f}s, max {report['ready_s']['max']:.3f}s)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
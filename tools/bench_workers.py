@@ -0,0 +1,276 @@
+"""
+Calls-per-host benchmark across worker counts
+
+For each worker count, starts the server (WEB_CONCURRENCY=N, production
+mode) against a standalone mock Sarvam AI with realistic latencies, then
+ramps up simulated callers on /media-stream. Each caller streams real-time
+20ms mulaw frames: speech, then silence until the reply starts, then a
+pause. A level passes when the p95 time from end of speech to the first
+reply frame stays within --slo-ms and under 1% of turns time out; the
+host's capacity is the highest passing level.
+
+The simulated callers run in this process: if the "client lag" column
+grows past a few tens of ms, the load generator (not the server) is the
+bottleneck and results at that level are not meaningful.
+
+Usage:
+    python tools/bench_workers.py --workers 1,2,4 --levels 10,20,40,80 --duration 20
+    python tools/bench_workers.py --workers 1,2 --json workers.json
+"""
+
+import os
+import sys
+import json
+import math
+import base64
+import time
+import random
+import audioop
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aiohttp
+from bench_startup import free_port, wait_for_200
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAME_SECONDS = 0.02
+FRAME_BYTES = 160
+SPEECH_SECONDS = 1.5  # Per turn, well above the server's minimum speech length
+LISTEN_SECONDS = 1.0  # Pause after the reply starts, before speaking again
+TURN_TIMEOUT = 15.0
+
+# One 20ms frame of a loud 440Hz tone (speech) and one of mulaw silence
+_pcm = b"".join(
+    int(8000 * math.sin(2 * math.pi * 440 * i / 8000)).to_bytes(2, "little", signed=True)
+    for i in range(FRAME_BYTES)
+)
+SPEECH_FRAME = audioop.lin2ulaw(_pcm, 2)
+SILENCE_FRAME = b"\xff" * FRAME_BYTES
+
+
+def _media_message(stream_sid: str, frame: bytes) -> str:
+    return json.dumps({"event": "media", "streamSid": stream_sid,
+                       "media": {"payload": base64.b64encode(frame).decode("ascii")}})
+
+
+def _process_tree(pid: int) -> list:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            for child in f.read().split():
+                pids.extend(_process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def memory_mib(pid: int) -> dict:
+    """Summed RSS and PSS (shared pages split between processes) of the server and its workers"""
+    totals = {"rss": 0, "pss": 0}
+    for proc in _process_tree(pid):
+        try:
+            with open(f"/proc/{proc}/smaps_rollup") as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    if name in ("Rss", "Pss"):
+                        totals[name.lower()] += int(value.split()[0])
+        except OSError:
+            pass
+    return {name: round(kib / 1024, 1) for name, kib in totals.items()}
+
+
+class Caller:
+    """One simulated Twilio media stream taking turns with the bot"""
+
+    def __init__(self, index: int, stats: dict):
+        self.stream_sid = f"MZbench{index}"
+        self.stats = stats
+        self.speech = _media_message(self.stream_sid, SPEECH_FRAME)
+        self.silence = _media_message(self.stream_sid, SILENCE_FRAME)
+        self.waiting_since = None
+        self.replied = asyncio.Event()
+
+    async def _read(self, ws):
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            if self.waiting_since is not None and '"media"' in msg.data:
+                self.stats["latencies"].append(time.perf_counter() - self.waiting_since)
+                self.waiting_since = None
+                self.replied.set()
+
+    async def _stream(self, ws, frame: str, seconds: float, until=None):
+        """Send frames in real time for `seconds` (or until the event is set)"""
+        start = next_send = time.perf_counter()
+        while time.perf_counter() - start < seconds and not (until and until.is_set()):
+            await ws.send_str(frame)
+            next_send += FRAME_SECONDS
+            lag = time.perf_counter() - next_send
+            self.stats["max_lag"] = max(self.stats["max_lag"], lag)
+            await asyncio.sleep(max(0.0, -lag))
+
+    async def run(self, url: str, session, stop_at: float):
+        async with session.ws_connect(url) as ws:
+            reader = asyncio.create_task(self._read(ws))
+            await ws.send_str(json.dumps({"event": "connected"}))
+            await ws.send_str(json.dumps({"event": "start", "start": {
+                "streamSid": self.stream_sid, "callSid": f"CA{self.stream_sid}",
+                "customParameters": {"language": "en-IN"},
+            }}))
+            await self._stream(ws, self.silence, random.uniform(0, SPEECH_SECONDS))  # Desynchronize callers
+            while time.perf_counter() < stop_at:
+                await self._stream(ws, self.speech, SPEECH_SECONDS)
+                self.replied.clear()
+                self.waiting_since = time.perf_counter()
+                self.stats["turns"] += 1
+                await self._stream(ws, self.silence, TURN_TIMEOUT, until=self.replied)
+                if not self.replied.is_set():
+                    self.stats["timeouts"] += 1
+                    self.waiting_since = None
+                await self._stream(ws, self.silence, LISTEN_SECONDS)
+            await ws.send_str(json.dumps({"event": "stop"}))
+            reader.cancel()
+
+
+async def run_level(port: int, calls: int, duration: float) -> dict:
+    stats = {"latencies": [], "turns": 0, "timeouts": 0, "errors": 0, "max_lag": 0.0}
+    stop_at = time.perf_counter() + duration
+    url = f"ws://127.0.0.1:{port}/media-stream"
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(
+            *(Caller(i, stats).run(url, session, stop_at) for i in range(calls)),
+            return_exceptions=True
+        )
+    stats["errors"] = sum(1 for r in results if isinstance(r, Exception))
+    latencies = sorted(stats.pop("latencies"))
+    stats["replies"] = len(latencies)
+    stats["p50_ms"] = round(statistics.median(latencies) * 1000) if latencies else None
+    stats["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000) if latencies else None
+    stats["max_lag_ms"] = round(stats.pop("max_lag") * 1000, 1)
+    return stats
+
+
+def passes(stats: dict, slo_ms: float) -> bool:
+    return (not stats["errors"] and stats["p95_ms"] is not None and stats["p95_ms"] <= slo_ms
+            and stats["timeouts"] <= 0.01 * max(1, stats["turns"]))
+
+
+async def wait_all_workers_ready(port: int, workers: int, deadline: float):
+    """/readyz on fresh connections until every worker has answered ready (connections land on any worker)"""
+    seen = set()
+    connector = aiohttp.TCPConnector(force_close=True)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=2)) as session:
+        while len(seen) < workers and time.perf_counter() < deadline:
+            ready = await wait_for_200(session, f"http://127.0.0.1:{port}/readyz", deadline)
+            seen.add(ready["worker_pid"])
+    if len(seen) < workers:
+        print(f"  ⚠️ only saw {len(seen)}/{workers} workers before the deadline")
+
+
+async def bench_workers(workers: int, levels: list, duration: float, slo_ms: float, env: dict) -> dict:
+    port = free_port()
+    run_env = dict(env, PORT=str(port), ENVIRONMENT="production", WEB_CONCURRENCY=str(workers))
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "twilio_server.py", cwd=ROOT, env=run_env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    results = []
+    try:
+        await wait_all_workers_ready(port, workers, time.perf_counter() + 60)
+        idle_memory = memory_mib(process.pid)
+        for calls in levels:
+            stats = await run_level(port, calls, duration)
+            stats.update(calls=calls, memory_mib=memory_mib(process.pid), passed=passes(stats, slo_ms))
+            results.append(stats)
+            print(f"  {calls:5d} calls: p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, "
+                  f"{stats['replies']}/{stats['turns']} replies, {stats['timeouts']} timeouts, "
+                  f"{stats['errors']} errors, client lag {stats['max_lag_ms']} ms, "
+                  f"PSS {stats['memory_mib']['pss']} MiB {'✅' if stats['passed'] else '❌'}")
+            if not stats["passed"]:
+                break
+    finally:
+        process.terminate()
+        await process.wait()
+    passing = [r["calls"] for r in results if r["passed"]]
+    return {"workers": workers, "capacity": max(passing) if passing else 0, "idle_memory_mib": idle_memory,
+            "levels": results}
+
+
+async def wait_for_port(port: int, deadline: float):
+    while time.perf_counter() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise TimeoutError(f"Nothing listening on port {port}")
+
+
+async def bench(worker_counts: list, levels: list, duration: float, slo_ms: float) -> list:
+    env = dict(os.environ)
+    for var in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_PHONE_NUMBER", "SARVAM_API_KEY"):
+        env.setdefault(var, "bench")
+    env.update({
+        "HEALTH_PROBE_TIMEOUT": "2",
+        "MAX_ACTIVE_STREAMS": "100000",  # Measure the host, not the admission limit
+        "SARVAM_STT_CONCURRENCY": "100000",
+        "SARVAM_LLM_CONCURRENCY": "100000",
+        "SARVAM_TTS_CONCURRENCY": "100000",
+        "SARVAM_POOL_SIZE": "1000",
+        "AUDIO_STORE_PATH": os.path.join(tempfile.mkdtemp(prefix="bench-workers-"), "audio_store.bin"),
+    })
+
+    # Mock Sarvam AI in its own process (default latencies) so it doesn't compete with the callers
+    mock_port = free_port()
+    mock = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(ROOT, "tools", "mock_sarvam.py"), "--port", str(mock_port),
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{mock_port}"
+    await wait_for_port(mock_port, time.perf_counter() + 10)
+    env.update({
+        "SARVAM_STT_URL": f"{base_url}/speech-to-text",
+        "SARVAM_TTS_URL": f"{base_url}/text-to-speech",
+        "SARVAM_LLM_URL": f"{base_url}/v1/chat/completions",
+    })
+    try:
+        reports = []
+        for workers in worker_counts:
+            print(f"{workers} worker{'s' if workers != 1 else ''}:")
+            reports.append(await bench_workers(workers, levels, duration, slo_ms, env))
+    finally:
+        mock.terminate()
+        await mock.wait()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calls per host by worker count")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--levels", default="10,20,40,80,160", help="Comma-separated concurrent call counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--slo-ms", type=float, default=3500.0,
+                        help="p95 end-of-speech to first reply frame (mock upstream latency is ~2.3s)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    levels = [int(n) for n in args.levels.split(",")]
+    reports = asyncio.run(bench(worker_counts, levels, args.duration, args.slo_ms))
+
+    print(f"\n{'workers':>7}  {'calls/host':>10}  {'idle PSS MiB':>12}")
+    for report in reports:
+        print(f"{report['workers']:>7}  {report['capacity']:>10}  {report['idle_memory_mib']['pss']:>12}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"slo_ms": args.slo_ms, "duration_s": args.duration, "results": reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
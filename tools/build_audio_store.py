@@ -0,0 +1,64 @@
+"""
+Build the shared audio store at deploy time
+
+Renders every fixed phrase (phrases.PHRASES and the intent replies from
+intent_matcher) with Sarvam AI TTS into the
+memory-mapped audio store, so workers map it at startup instead of
+rendering it themselves. Phrases already in the store with the same text
+(and TTS endpoint) are kept. Uses the same SARVAM_* environment as the
+server.
+
+Usage:
+    python tools/build_audio_store.py
+    python tools/build_audio_store.py --path /var/data/audio_store.bin --rebuild
+    python tools/build_audio_store.py --best-effort   # never fail the deploy
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from audio_store import AUDIO_STORE_PATH
+from intent_matcher import IntentMatcher
+from phrases import PHRASES, PhraseCache
+from sarvam_ai import SarvamAI
+
+
+async def build(path: str, rebuild: bool) -> tuple:
+    sarvam = SarvamAI()
+    try:
+        cache = PhraseCache(dict(PHRASES, **IntentMatcher.from_env().reply_phrases()), store_path=path)
+        ready = await cache.warm_up(sarvam, rebuild=rebuild)
+    finally:
+        await sarvam.close()
+    return ready, cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render fixed phrases into the shared audio store")
+    parser.add_argument("--path", default=AUDIO_STORE_PATH, help="Store file (default: AUDIO_STORE_PATH)")
+    parser.add_argument("--rebuild", action="store_true", help="Re-render every phrase")
+    parser.add_argument("--best-effort", action="store_true", help="Exit 0 even if some phrases failed")
+    args = parser.parse_args()
+
+    if not os.getenv("SARVAM_API_KEY"):
+        print("SARVAM_API_KEY is not set; workers will build the store on first start")
+        sys.exit(0 if args.best_effort else 1)
+
+    ready, cache = asyncio.run(build(args.path, args.rebuild))
+    store = cache.store
+    print(f"{ready}/{cache.total} phrases in {args.path}"
+          f"{f' ({store.size / 1024:.1f} KiB)' if store else ' (store not written)'}")
+    if ready < cache.total and not args.best_effort:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Check the intent table against example transcripts
+
+Every example must match its expected intent, and every negative example
+(everyday phrasings that share words with an intent pattern) must match
+nothing. Run before merging pattern changes or deploying an
+INTENT_TABLE_PATH file; exits non-zero on any mismatch.
+
+Usage:
+    python tools/check_intents.py
+    INTENT_TABLE_PATH=intents.json python tools/check_intents.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_matcher import IntentMatcher  # noqa: E402
+
+EXAMPLES = [
+    ("Can I talk to a person?", "transfer"),
+    ("I want to speak with someone", "transfer"),
+    ("Please connect me to an agent", "transfer"),
+    ("I need a human agent", "transfer"),
+    ("ఆపరేటర్‌తో మాట్లాడాలి", "transfer"),
+    ("ఆపరేటర్తో మాట్లాడాలి", "transfer"),
+    ("किसी व्यक्ति से बात करनी है", "transfer"),
+    ("ऑपरेटर से बात कराइए", "transfer"),
+    ("There are sparks coming from the pole!", "emergency"),
+    ("The transformer caught fire", "emergency"),
+    ("A wire fell on the road", "emergency"),
+    ("I don't have power, there are sparks near the meter", "emergency"),
+    ("No power since morning and a wire fell on the road", "emergency"),
+    ("मेरे घर के पास आग लगी है", "emergency"),
+    ("बच्चे को करंट का झटका लगा", "emergency"),
+    ("सड़क पर तार गिरा है", "emergency"),
+    ("మా వీధిలో వైరు తెగిపడింది", "emergency"),
+    ("కరెంట్ షాక్ కొట్టింది", "emergency"),
+    ("What's the lineman's number?", "lineman_contact"),
+    ("मुझे लाइनमैन का नंबर चाहिए", "lineman_contact"),
+    ("లైన్‌మ్యాన్ నంబర్ ఇవ్వండి", "lineman_contact"),
+    ("Hello!", "greeting"),
+    ("నమస్కారం", "greeting"),
+    ("नमस्ते जी", "greeting"),
+    ("Hello sir, good morning", "greeting"),
+    ("హలో అండి", "greeting"),
+]
+
+NEGATIVE_EXAMPLES = [
+    "आगे क्या करना है",
+    "मेरे घर में आगे बिजली नहीं है",
+    "बिल देखकर झटका लगा",
+    "मेरा बिल देखकर मुझे झटका लगा",
+    "బిల్లు చూసి షాక్ అయ్యాను",
+    "There is no fire, just no power",
+    "I want to fire a complaint",
+    "The agent said my bill is high",
+    "The operator said it will be fixed today",
+    "There are no sparks, only low voltage",
+    "It is not an emergency",
+    "I don't want to talk to a person",
+    "No need to transfer me",
+    "I do not need an emergency, my bill is wrong",
+    "मुझे किसी व्यक्ति से बात नहीं करनी",
+    "Hello, my power is out since morning",
+    "Hi, no power",
+    "Hello power cut",
+    "హలో కరెంట్ పోయింది",
+    "नमस्ते बिजली नहीं है",
+    "I want to speak in Hindi",
+    "మా ఇంట్లో కరెంట్ లేదు",
+    "मेरा बिल बहुत ज्यादा आया है",
+]
+
+
+def check(matcher: IntentMatcher) -> list:
+    """Returns (transcript, expected, got) for every example that did not match as expected"""
+    failures = []
+    cases = EXAMPLES + [(text, None) for text in NEGATIVE_EXAMPLES]
+    for text, expected in cases:
+        match = matcher.match(text)
+        got = match.intent if match else None
+        if got != expected:
+            failures.append((text, expected, got))
+    return failures
+
+
+def main():
+    matcher = IntentMatcher.from_env()
+    failures = check(matcher)
+    for text, expected, got in failures:
+        print(f"❌ {text!r}: expected {expected}, got {got}")
+    total = len(EXAMPLES) + len(NEGATIVE_EXAMPLES)
+    print(f"{total - len(failures)}/{total} examples passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
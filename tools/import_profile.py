@@ -0,0 +1,76 @@
+"""
+Import-time profile of the server
+
+Runs `python -X importtime -c "import twilio_server"` in a fresh interpreter
+and reports the slowest imports by cumulative time.
+
+Usage:
+    python tools/import_profile.py
+    python tools/import_profile.py --top 40 --json import_profile.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DUMMY_ENV = {
+    "TWILIO_ACCOUNT_SID": "profile",
+    "TWILIO_AUTH_TOKEN": "profile",
+    "TWILIO_PHONE_NUMBER": "profile",
+    "SARVAM_API_KEY": "profile",
+}
+
+
+def profile(module: str) -> list:
+    """Returns [{"module", "self_ms", "cumulative_ms", "depth"}] in import order"""
+    env = dict(DUMMY_ENV, **os.environ)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile server import time")
+    parser.add_argument("--module", default="twilio_server")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", help="Write the full profile to this file")
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    target = next((r for r in rows if r["module"] == args.module), None)
+    top_level = [r for r in rows if r["depth"] <= 1]
+
+    print(f"Total import time of {args.module}: {target['cumulative_ms']:.1f} ms" if target else "")
+    print("\nDirect imports by cumulative time:")
+    for row in sorted(top_level, key=lambda r: r["cumulative_ms"], reverse=True)[:args.top]:
+        if row is not target:
+            print(f"  {row['cumulative_ms']:8.1f} ms  {row['module']}")
+    print("\nSlowest modules by self time:")
+    for row in sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:args.top]:
+        print(f"  {row['self_ms']:8.1f} ms  {row['module']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"module": args.module, "total_ms": target and target["cumulative_ms"], "imports": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Local stand-in for the Sarvam AI STT, LLM and TTS endpoints
+
+Used by tools/replay_call.py to replay captured calls deterministically:
+responses and latencies come from the capture's upstream records, in order.
+A capture has one record per turn, written after SarvamAI's retries, so a
+failed record (empty transcript, TTS error) is served to every retry of that
+request (RETRY_COUNT attempts, latency split between them) instead of
+consuming the next turn's record. When the script runs out, canned
+responses with default latencies are used.
+
+Can also run standalone for local development:
+
+    python tools/mock_sarvam.py --port 9000
+    export SARVAM_STT_URL=http://127.0.0.1:9000/speech-to-text
+    export SARVAM_TTS_URL=http://127.0.0.1:9000/text-to-speech
+    export SARVAM_LLM_URL=http://127.0.0.1:9000/v1/chat/completions
+"""
+
+import io
+import os
+import sys
+import wave
+import base64
+import asyncio
+import argparse
+from collections import deque
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sarvam_ai import RETRY_COUNT
+
+DEFAULT_LATENCY_MS = {"stt": 800, "llm": 600, "tts": 900}
+DEFAULT_TRANSCRIPT = "My power is out since this morning"
+DEFAULT_REPLY = "Sorry for the trouble. Can you tell me your service number?"
+DEFAULT_TTS_BYTES = 16044  # ~1 second of 8kHz 16-bit audio
+
+
+def silence_wav(num_bytes: int) -> bytes:
+    """Build an 8kHz mono 16-bit WAV of roughly num_bytes total size"""
+    frames = max(0, (num_bytes - 44) // 2)
+    wav_io = io.BytesIO()
+    with wave.open(wav_io, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(b"\x00\x00" * frames)
+    return wav_io.getvalue()
+
+
+class MockSarvam:
+    """Scripted Sarvam AI endpoints backed by capture upstream records"""
+
+    def __init__(self, upstream_records=(), speed: float = 1.0):
+        self.speed = speed
+        self.scripts = {"stt": deque(), "llm": deque(), "tts": deque()}
+        for record in upstream_records:
+            if record.get("stage") in self.scripts:
+                self.scripts[record["stage"]].append(record)
+        self.requests = {"stt": 0, "llm": 0, "tts": 0}
+        self._retries = {}  # stage -> (failed record, attempts left to serve it to)
+        self.scripted = True  # When False (e.g. during server warm-up), serve defaults without consuming the script
+        self.base_url = None
+        self._runner = None
+
+    @staticmethod
+    def _failed(stage: str, record: dict) -> bool:
+        """Whether the client retries after this record's response"""
+        if stage == "stt":
+            return not (record.get("transcript") or "").strip()
+        if stage == "tts":
+            return not record.get("response_bytes", DEFAULT_TTS_BYTES)
+        return False  # LLM failures are captured as the client's fallback reply
+
+    def _next(self, stage: str) -> dict:
+        self.requests[stage] += 1
+        if stage in self._retries:
+            record, left = self._retries.pop(stage)
+            if left > 1:
+                self._retries[stage] = (record, left - 1)
+            return record
+        if self.scripted and self.scripts[stage]:
+            record = self.scripts[stage].popleft()
+            if RETRY_COUNT > 1 and self._failed(stage, record):
+                record = dict(record, duration_ms=record.get("duration_ms", 0) / RETRY_COUNT)
+                self._retries[stage] = (record, RETRY_COUNT - 1)
+            return record
+        return {"duration_ms": DEFAULT_LATENCY_MS[stage]}
+
+    async def _delay(self, record: dict):
+        if self.speed > 0:
+            await asyncio.sleep(record.get("duration_ms", 0) / 1000 / self.speed)
+
+    async def speech_to_text(self, request: web.Request):
+        await request.post()  # Consume the multipart upload like the real API
+        record = self._next("stt")
+        await self._delay(record)
+        return web.json_response({"transcript": record.get("transcript", DEFAULT_TRANSCRIPT)})
+
+    async def chat(self, request: web.Request):
+        await request.json()
+        record = self._next("llm")
+        await self._delay(record)
+        content = record.get("response", DEFAULT_REPLY)
+        return web.json_response({"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+    async def text_to_speech(self, request: web.Request):
+        await request.json()
+        record = self._next("tts")
+        await self._delay(record)
+        num_bytes = record.get("response_bytes", DEFAULT_TTS_BYTES)
+        if not num_bytes:
+            return web.json_response({"error": "scripted TTS failure"}, status=500)
+        audio = base64.b64encode(silence_wav(num_bytes)).decode("utf-8")
+        return web.json_response({"audios": [audio]})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/speech-to-text", self.speech_to_text)
+        app.router.add_post("/text-to-speech", self.text_to_speech)
+        app.router.add_post("/v1/chat/completions", self.chat)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the base URL"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}"
+        return self.base_url
+
+    def env(self) -> dict:
+        """Environment variables pointing SarvamAI at this mock"""
+        return {
+            "SARVAM_STT_URL": f"{self.base_url}/speech-to-text",
+            "SARVAM_TTS_URL": f"{self.base_url}/text-to-speech",
+            "SARVAM_LLM_URL": f"{self.base_url}/v1/chat/completions",
+        }
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(host: str, port: int):
+    mock = MockSarvam()
+    await mock.start(host, port)
+    for key, value in mock.env().items():
+        print(f"{key}={value}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Sarvam AI stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
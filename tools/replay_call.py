@@ -0,0 +1,231 @@
+"""
+Replay a captured call through /media-stream against a mocked Sarvam AI
+
+Feeds the inbound Twilio events of a capture (see call_capture.py) into the
+current code at real or accelerated speed, with Sarvam AI replaced by
+tools/mock_sarvam.py replaying the captured transcripts, replies and
+latencies. Prints the endpointing decisions and per-turn latency of the
+original call next to the replay, so behaviour can be compared across
+code changes.
+
+Usage:
+    python tools/replay_call.py captures/CA123-1700000000.jsonl.gz
+    python tools/replay_call.py capture.jsonl.gz --speed 4 --json report.json
+    python tools/replay_call.py capture.jsonl.gz --speed 0 --strict   # as fast as possible
+"""
+
+import os
+import sys
+import json
+import glob
+import base64
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+import uvicorn
+from loguru import logger
+
+from call_capture import load_capture
+from mock_sarvam import MockSarvam
+
+
+def turn_summary(records: list) -> list:
+    """Turn decisions with the pipeline latency that followed each processed turn"""
+    turns = [r for r in records if r["type"] == "turn"]
+    upstream = [r for r in records if r["type"] == "upstream"]
+    summary = []
+    for i, turn in enumerate(turns):
+        next_t = turns[i + 1]["t"] if i + 1 < len(turns) else float("inf")
+        stages = [u for u in upstream if turn["t"] <= u["t"] < next_t]
+        latency = None
+        if turn["outcome"] == "processed" and stages:
+            latency = round(max(u["t"] + u["duration_ms"] for u in stages) - turn["t"], 1)
+        summary.append({
+            "t": turn["t"],
+            "bytes": turn["bytes"],
+            "reason": turn["reason"],
+            "outcome": turn["outcome"],
+            "latency_ms": latency,
+            "upstream_ms": {u["stage"]: u["duration_ms"] for u in stages},
+        })
+    return summary
+
+
+def compare(original: list, replayed: list) -> dict:
+    """Line up original and replayed turns"""
+    rows = []
+    for i in range(max(len(original), len(replayed))):
+        orig = original[i] if i < len(original) else None
+        rep = replayed[i] if i < len(replayed) else None
+        same = bool(orig and rep and all(orig[k] == rep[k] for k in ("bytes", "reason", "outcome")))
+        rows.append({"turn": i + 1, "original": orig, "replay": rep, "match": same})
+    return {
+        "turns_original": len(original),
+        "turns_replay": len(replayed),
+        "decisions_matched": sum(1 for row in rows if row["match"]),
+        "rows": rows,
+    }
+
+
+async def _echo_mark(ws, event: dict, delay: float):
+    await asyncio.sleep(delay)
+    if not ws.closed:
+        await ws.send_str(json.dumps({"event": "mark", "streamSid": event.get("streamSid"), "mark": event["mark"]}))
+
+
+async def _drain(ws, stats: dict, speed: float, echo_marks: bool):
+    """Read (and count) everything the server sends back
+
+    With echo_marks, behave like Twilio: play queued media in (scaled) real
+    time and echo each mark when playback reaches it; clear drops the queue.
+    """
+    loop = asyncio.get_event_loop()
+    playback_end = loop.time()
+    echoes = []
+    async for msg in ws:
+        if msg.type != aiohttp.WSMsgType.TEXT:
+            break
+        event = json.loads(msg.data)
+        event_type = event.get("event", "unknown")
+        stats[event_type] = stats.get(event_type, 0) + 1
+        if not echo_marks:
+            continue
+        if event_type == "media":
+            seconds = len(base64.b64decode(event["media"]["payload"])) / 8000
+            playback_end = max(playback_end, loop.time()) + (seconds / speed if speed > 0 else 0)
+        elif event_type == "mark":
+            echoes.append(asyncio.create_task(_echo_mark(ws, event, max(0, playback_end - loop.time()))))
+        elif event_type == "clear":
+            for task in echoes:
+                task.cancel()
+            echoes = []
+            playback_end = loop.time()
+    for task in echoes:
+        task.cancel()
+
+
+async def replay(records: list, speed: float, out_dir: str, echo_marks: bool = False) -> dict:
+    """Run one capture through the app; returns outbound message counts"""
+    mock = MockSarvam([r for r in records if r["type"] == "upstream"], speed=speed)
+    mock.scripted = False  # Warm-up requests must not consume the captured responses
+    await mock.start()
+    os.environ.update(mock.env())
+    os.environ["CALL_CAPTURE_DIR"] = out_dir
+    os.environ["AUDIO_STORE_PATH"] = ""  # Keep mock-rendered phrases out of the shared audio store
+    for var in ("TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_PHONE_NUMBER", "SARVAM_API_KEY"):
+        os.environ.setdefault(var, "replay")
+
+    import twilio_server
+
+    server = uvicorn.Server(uvicorn.Config(twilio_server.app, host="127.0.0.1", port=0, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            raise RuntimeError("Server failed to start")
+        await asyncio.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    inbound = [r for r in records if r["type"] in ("twilio", "media")]
+    outbound = {}
+    loop = asyncio.get_event_loop()
+    try:
+        async with aiohttp.ClientSession() as session:
+            # Wait for warm-up like Twilio traffic would (Render gates on /readyz)
+            while True:
+                async with session.get(f"http://127.0.0.1:{port}/readyz") as response:
+                    if response.status == 200:
+                        break
+                await asyncio.sleep(0.05)
+            mock.scripted = True
+            async with session.ws_connect(f"ws://127.0.0.1:{port}/media-stream") as ws:
+                reader = asyncio.create_task(_drain(ws, outbound, speed, echo_marks))
+                stream_sid = None
+                first_t = inbound[0]["t"] if inbound else 0
+                replay_start = loop.time()
+                for record in inbound:
+                    if speed > 0:
+                        delay = (record["t"] - first_t) / 1000 / speed - (loop.time() - replay_start)
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    if record["type"] == "media":
+                        event = {"event": "media", "streamSid": stream_sid, "media": {"payload": record["payload"]}}
+                    else:
+                        event = record["event"]
+                        if event.get("event") == "start":
+                            stream_sid = event["start"].get("streamSid")
+                    await ws.send_str(json.dumps(event))
+                    if ws.closed:
+                        break
+                if not any(r["type"] == "twilio" and r["event"].get("event") == "stop" for r in inbound):
+                    await ws.close()
+                await asyncio.wait_for(reader, timeout=120)
+    finally:
+        server.should_exit = True
+        await server_task
+        await mock.stop()
+
+    outbound["sarvam_requests"] = dict(mock.requests)
+    return outbound
+
+
+def print_report(report: dict):
+    print(f"Turns: original={report['turns_original']} replay={report['turns_replay']} "
+          f"matched={report['decisions_matched']}")
+    print(f"{'#':>3}  {'original':<36}  {'replay':<36}  {'latency ms (orig/replay)':>24}")
+    for row in report["rows"]:
+        cells = []
+        for side in ("original", "replay"):
+            turn = row[side]
+            cells.append(f"{turn['bytes']:>6}B {turn['reason']:<10} {turn['outcome']:<10}" if turn else "-")
+        latencies = "/".join(
+            str(row[side]["latency_ms"]) if row[side] and row[side]["latency_ms"] is not None else "-"
+            for side in ("original", "replay")
+        )
+        flag = "" if row["match"] else "  <-- differs"
+        print(f"{row['turn']:>3}  {cells[0]:<36}  {cells[1]:<36}  {latencies:>24}{flag}")
+    print(f"Outbound messages: {report['outbound']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured call against mocked Sarvam AI")
+    parser.add_argument("capture", help="Capture file written with CALL_CAPTURE_DIR")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed (0 = as fast as possible)")
+    parser.add_argument("--out", help="Directory for the replay capture (default: temp dir)")
+    parser.add_argument("--json", help="Write the comparison report to this file")
+    parser.add_argument("--echo-marks", action="store_true",
+                        help="Simulate Twilio mark echoes (for captures recorded without bulk playout)")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any endpointing decision differs")
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    records = load_capture(args.capture)
+    out_dir = args.out or tempfile.mkdtemp(prefix="replay-")
+    outbound = asyncio.run(replay(records, args.speed, out_dir, args.echo_marks))
+
+    replays = sorted(glob.glob(os.path.join(out_dir, "*.jsonl.gz")), key=os.path.getmtime)
+    if not replays:
+        print("Replay produced no capture (stream never started?)", file=sys.stderr)
+        sys.exit(2)
+    report = compare(turn_summary(records), turn_summary(load_capture(replays[-1])))
+    report["speed"] = args.speed
+    report["outbound"] = outbound
+    report["replay_capture"] = replays[-1]
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.strict and report["decisions_matched"] != max(report["turns_original"], report["turns_replay"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the Twilio REST "create call" API
+
+Accepts POST /2010-04-01/Accounts/{sid}/Calls.json like Twilio, then plays
+each call's lifecycle by posting status callbacks (initiated, ringing,
+in-progress, completed / busy / no-answer) to the StatusCallback URL,
+signed with the auth token the call was created with (X-Twilio-Signature).
+Enforces an account calls-per-second limit with HTTP 429 like Twilio does,
+and tracks the peak dial rate and peak concurrent calls it observed.
+
+    python tools/twilio_standin.py --port 9100 --call-seconds 5
+    export TWILIO_API_BASE_URL=http://127.0.0.1:9100
+
+GET /stats returns the observed counters.
+"""
+
+import time
+import base64
+import random
+import asyncio
+import argparse
+from aiohttp import web, ClientSession
+from twilio.request_validator import RequestValidator
+
+
+class TwilioStandIn:
+    """Fake Twilio REST API with simulated call lifecycles"""
+
+    def __init__(self, call_seconds: float = 5.0, max_cps: float = 0, busy_rate: float = 0.0,
+                 no_answer_rate: float = 0.0, seed: int = None):
+        self.call_seconds = call_seconds
+        self.max_cps = max_cps
+        self.busy_rate = busy_rate
+        self.no_answer_rate = no_answer_rate
+        self.random = random.Random(seed)
+        self.created = 0
+        self.rejected_429 = 0
+        self.active = 0
+        self.peak_active = 0
+        self.peak_cps = 0
+        self._recent = []  # Creation times in the last second
+        self._tasks = set()
+        self._session = None
+        self._runner = None
+        self.base_url = None
+
+    async def create_call(self, request: web.Request):
+        form = await request.post()
+        now = time.monotonic()
+        self._recent = [t for t in self._recent if now - t < 1.0]
+        if self.max_cps and len(self._recent) >= self.max_cps:
+            self.rejected_429 += 1
+            return web.json_response({"code": 20429, "message": "Too Many Requests"}, status=429)
+        if not form.get("To") or not form.get("Url"):
+            return web.json_response({"code": 21201, "message": "To and Url are required"}, status=400)
+
+        self._recent.append(now)
+        self.peak_cps = max(self.peak_cps, len(self._recent))
+        self.created += 1
+        call_sid = f"CA{self.created:032d}"
+        # Callbacks are signed with the account's auth token, taken from the request's Basic auth
+        _, _, credentials = request.headers.get("Authorization", "").partition(" ")
+        auth_token = base64.b64decode(credentials or b"").decode().partition(":")[2]
+        task = asyncio.create_task(self._lifecycle(call_sid, form.get("StatusCallback"), auth_token))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({"sid": call_sid, "status": "queued", "to": form["To"],
+                                  "from": form.get("From")}, status=201)
+
+    async def _lifecycle(self, call_sid: str, callback: str, auth_token: str):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            roll = self.random.random()
+            if roll < self.busy_rate:
+                steps = [("initiated", 0.1), ("busy", 0.5)]
+            elif roll < self.busy_rate + self.no_answer_rate:
+                steps = [("initiated", 0.1), ("ringing", 0.3), ("no-answer", 1.0)]
+            else:
+                steps = [("initiated", 0.1), ("ringing", 0.3), ("in-progress", 0.5),
+                         ("completed", self.call_seconds)]
+            started = time.monotonic()
+            for sequence, (status, delay) in enumerate(steps):
+                await asyncio.sleep(delay)
+                if callback:
+                    data = {"CallSid": call_sid, "CallStatus": status, "SequenceNumber": str(sequence)}
+                    if status == "completed":
+                        data["CallDuration"] = str(int(time.monotonic() - started))
+                    try:
+                        signature = RequestValidator(auth_token).compute_signature(callback, data)
+                        async with self._session.post(callback, data=data,
+                                                      headers={"X-Twilio-Signature": signature}) as response:
+                            await response.read()
+                    except Exception:
+                        pass  # Twilio does not retry failed callbacks either
+        finally:
+            self.active -= 1
+
+    async def stats(self, request: web.Request):
+        return web.json_response(self.snapshot())
+
+    def snapshot(self) -> dict:
+        return {"created": self.created, "rejected_429": self.rejected_429, "active": self.active,
+                "peak_active": self.peak_active, "peak_cps": self.peak_cps}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._session = ClientSession()
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{account_sid}/Calls.json", self.create_call)
+        app.router.add_get("/stats", self.stats)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.base_url = f"http://{host}:{self._runner.addresses[0][1]}"
+        return self.base_url
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+        if self._session:
+            await self._session.close()
+
+
+async def _serve(args):
+    standin = TwilioStandIn(call_seconds=args.call_seconds, max_cps=args.max_cps,
+                            busy_rate=args.busy_rate, no_answer_rate=args.no_answer_rate, seed=args.seed)
+    print(f"TWILIO_API_BASE_URL={await standin.start(args.host, args.port)}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local Twilio REST API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--call-seconds", type=float, default=5.0, help="Duration of answered calls")
+    parser.add_argument("--max-cps", type=float, default=1, help="Account CPS limit (0 = unlimited)")
+    parser.add_argument("--busy-rate", type=float, default=0.0)
+    parser.add_argument("--no-answer-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
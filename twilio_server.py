@@ -4,18 +4,32 @@ Handles Twilio webhooks and connects to your existing bot
 """
 
 import os
+import json
+import time
+import audioop
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, WebSocket
-from fastapi.responses import Response
-from twilio.rest import Client
+from fastapi.responses import Response, JSONResponse
 from twilio.twiml.voice_response import VoiceResponse, Connect, Stream
 from dotenv import load_dotenv
 from loguru import logger
+from audio_utils import decode_mulaw_base64, mulaw_to_wav, wav_to_mulaw
+from call_capture import CallRecorder
+from call_session import (CallSession, CallRegistry, SILENCE_THRESHOLD, MIN_SPEECH_LENGTH, MAX_SPEECH_LENGTH,
+                          MAX_FAILED_STT_ATTEMPTS, MAX_HISTORY_MESSAGES)
+from health import HealthProber, WarmupGate, HEALTH_PROBE_TIMEOUT
+from campaign import CampaignManager, TwilioDialer, token_authorized
+from capacity import AdmissionController, ADMISSION_STATE_PATH
+from model_router import ModelRouter
+from segmented_stt import SegmentedSTT, SegmentStats, STT_SEGMENT_MS, SEGMENT_BYTES, PAUSE_MIN_BYTES
+from sarvam_ai import SarvamAI
+from intent_matcher import IntentMatcher
+from phrases import PHRASES, PhraseCache, DEFAULT_LANGUAGE, LANGUAGE_MENU, LANGUAGE_MENU_RETRY
+from playout import PLAYOUT_MODE, MaskingStats, send_clear, send_paced, send_bulk, truncate_to_heard
 
 load_dotenv()
 
-app = FastAPI()
-
 # Validate required environment variables
 required_env_vars = ["TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "TWILIO_PHONE_NUMBER", "SARVAM_API_KEY"]
 missing_vars = [var for var in required_env_vars if not os.getenv(var)]
@@ -23,11 +37,144 @@ if missing_vars:
     logger.error(f"❌ Missing required environment variables: {', '.join(missing_vars)}")
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-# Twilio client
-twilio_client = Client(
-    os.getenv("TWILIO_ACCOUNT_SID"),
-    os.getenv("TWILIO_AUTH_TOKEN")
+# Twilio REST client, created on first use (the SDK is slow to import and only health checks need it)
+_twilio_client = None
+
+
+def get_twilio_client():
+    global _twilio_client
+    if _twilio_client is None:
+        from twilio.rest import Client
+        from twilio.http.http_client import TwilioHttpClient
+        _twilio_client = Client(
+            os.getenv("TWILIO_ACCOUNT_SID"),
+            os.getenv("TWILIO_AUTH_TOKEN"),
+            http_client=TwilioHttpClient(timeout=HEALTH_PROBE_TIMEOUT)
+        )
+    return _twilio_client
+
+
+# Shared Sarvam AI client: one connection pool for all calls in this process
+sarvam = SarvamAI()
+intents = IntentMatcher.from_env()  # Templated replies for common requests, without the LLM (INTENT_TABLE_PATH)
+phrase_cache = PhraseCache(dict(PHRASES, **intents.reply_phrases()))
+masking = MaskingStats()  # Acknowledgement clips while replies are pending (MASK_DELAY_MS)
+model_router = ModelRouter()  # Per-turn LLM/TTS configuration within TURN_BUDGET_MS
+segment_stats = SegmentStats()  # Long turns transcribed in segments while the caller talks (STT_SEGMENT_MS)
+
+# Admission control: caps active media streams (MAX_ACTIVE_STREAMS), shared by all workers when there are several
+admission = AdmissionController(state_path=ADMISSION_STATE_PATH if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 else None)
+call_registry = CallRegistry()  # Live media stream sessions, for /calls
+OVERLOAD_ACTION = os.getenv("OVERLOAD_ACTION", "busy").lower()  # busy | wait | redirect
+OVERLOAD_REDIRECT_NUMBER = os.getenv("OVERLOAD_REDIRECT_NUMBER")  # Human line for OVERLOAD_ACTION=redirect
+OVERLOAD_MAX_WAITS = int(os.getenv("OVERLOAD_MAX_WAITS", "3"))
+OVERLOAD_WAIT_SECONDS = int(os.getenv("OVERLOAD_WAIT_SECONDS", "10"))
+
+# Language menu: "gather" (TwiML <Gather> webhooks) or "stream" (pre-rendered prompts + in-stream DTMF)
+IVR_MODE = os.getenv("IVR_MODE", "gather").lower()
+IVR_DTMF_TIMEOUT = float(os.getenv("IVR_DTMF_TIMEOUT", "10"))  # Seconds after the menu before defaulting to Telugu
+
+# Conversation context with language-specific system prompt
+language_names = {
+    "te-IN": "Telugu",
+    "hi-IN": "Hindi", 
+    "en-IN": "English"
+}
+
+# IVR digit -> language
+language_map = {
+    "1": {"code": "te-IN", "name": "Telugu"},
+    "2": {"code": "hi-IN", "name": "Hindi"},
+    "3": {"code": "en-IN", "name": "English"}
+}
+
+SYSTEM_PROMPT_TEMPLATE = """You are a helpful customer support agent for the Electrical Department in India.
+
+CRITICAL: User selected {language_name} language. You MUST respond ONLY in {language_name}.
+
+Your responsibilities:
+- Handle electrical complaints (power outages, voltage issues, meter problems)
+- Provide information about electricity bills and payments
+- Help with new connection requests
+- Report electrical hazards and emergencies
+- Provide lineman contact numbers and department information
+
+Guidelines:
+- Keep responses SHORT and CONCISE (2-3 sentences maximum for voice calls)
+- Be professional, polite, and helpful
+- Ask ONE clear question at a time
+- If you don't have specific information, acknowledge briefly and offer to connect to a human agent
+- For emergencies, prioritize safety and provide emergency contact: 1912
+
+Common queries you can help with:
+- Power outage complaints
+- High electricity bill queries
+- New connection applications
+- Meter reading issues
+- Lineman contact numbers
+- Payment methods
+- Emergency electrical issues
+
+Remember: ALWAYS respond in {language_name} language only!"""
+
+# Prompt cache: system prompts are built once, not per call
+system_prompts = {
+    code: SYSTEM_PROMPT_TEMPLATE.format(language_name=name)
+    for code, name in language_names.items()
+}
+
+# Background health checks (cached) and warm-up tracking for /readyz
+health_prober = HealthProber(
+    twilio_check=lambda: get_twilio_client().api.accounts(os.getenv("TWILIO_ACCOUNT_SID")).fetch(),
+    sarvam_urls={
+        "sarvam_stt": sarvam.stt_url,
+        "sarvam_llm": sarvam.llm_url,
+        "sarvam_tts": sarvam.tts_url,
+    },
 )
+warmup = WarmupGate()
+campaign_manager = CampaignManager(TwilioDialer())
+for step in ("health_probe", "sarvam_pool", "phrase_cache"):
+    warmup.register(step)
+process_start_time = time.time()
+
+
+async def warm_health_probe():
+    await health_prober.wait_first_round()
+    probe = health_prober.snapshot()
+    failing = [name for name, check in probe["checks"].items() if not check["ok"]]
+    warmup.complete("health_probe", ok=not failing, detail=f"failing: {', '.join(failing)}" if failing else None)
+
+
+async def warm_sarvam():
+    """Pre-connect the Sarvam pool (DNS, TCP, TLS), then pre-render fixed phrases through it"""
+    hosts = await sarvam.warm_up()
+    failed = [host for host, latency in hosts.items() if latency is None]
+    warmup.complete("sarvam_pool", ok=not failed, detail=json.dumps(hosts))
+    
+    rendered = await phrase_cache.warm_up(sarvam)
+    warmup.complete("phrase_cache", ok=rendered == phrase_cache.total,
+                    detail=f"{rendered}/{phrase_cache.total} phrases ready")
+
+
+async def run_warmup():
+    """Run startup steps in the background; /readyz reports ready once all finish"""
+    await asyncio.gather(warm_health_probe(), warm_sarvam())
+    logger.info(f"✅ Warm-up finished in {time.time() - process_start_time:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await health_prober.start()
+    warmup_task = asyncio.create_task(run_warmup())
+    yield
+    warmup_task.cancel()
+    await health_prober.stop()
+    await campaign_manager.close()
+    await sarvam.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 @app.head("/")
@@ -37,42 +184,97 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint with dependency verification"""
+    """Health check endpoint serving the cached background probe results"""
+    probe = health_prober.snapshot()
+    checks = probe["checks"]
+    sarvam_checks = [check for name, check in checks.items() if name.startswith("sarvam_")]
+    
     health_status = {
-        "status": "healthy",
+        "status": "healthy" if probe["healthy"] else ("starting" if not checks else "degraded"),
         "service": "Twilio Voice Bot",
-        "checks": {}
+        "checks": {
+            "env_vars": all([
+                os.getenv("TWILIO_ACCOUNT_SID"),
+                os.getenv("TWILIO_AUTH_TOKEN"),
+                os.getenv("TWILIO_PHONE_NUMBER"),
+                os.getenv("SARVAM_API_KEY")
+            ]),
+            "sarvam_ai": bool(sarvam_checks) and all(check["ok"] for check in sarvam_checks),
+            "twilio": checks.get("twilio", {}).get("ok", False),
+        },
+        "probes": checks,
     }
+    return health_status
+
+
+@app.get("/livez")
+async def liveness():
+    """Liveness: the process is up and the event loop is responsive"""
+    return {"status": "alive", "uptime_s": round(time.time() - process_start_time, 1)}
+
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: warm-up finished; includes cached dependency state (503 while warming up)"""
+    ready = warmup.ready
+    body = {
+        "status": "ready" if ready else "warming_up",
+        "worker_pid": os.getpid(),
+        "warmup": warmup.snapshot(),
+        "health": health_prober.snapshot(),
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Capacity metrics: admitted/rejected calls and per-endpoint upstream queue times"""
+    return {
+        "worker_pid": os.getpid(),
+        "admission": admission.snapshot(),
+        "upstream": {name: limiter.snapshot() for name, limiter in sarvam.limiters.items()},
+        "latency_masking": masking.snapshot(),
+        "model_routing": model_router.snapshot(),
+        "intents": intents.snapshot(),
+        "segmented_stt": segment_stats.snapshot(),
+    }
+
+
+@app.get("/calls")
+async def active_calls(request: Request):
+    """Live view of the calls this process is handling: state, turns, buffers and last-stage latencies
+    
+    Lists live Call/Stream SIDs, so it needs the same bearer token as the campaign API
+    """
+    denied = campaign_auth_error(request)
+    if denied is not None:
+        return denied
+    return dict(call_registry.snapshot(), worker_pid=os.getpid())
+
+
+def overload_response(wait_count: int) -> VoiceResponse:
+    """Fast TwiML for callers arriving while the server is at capacity"""
+    response = VoiceResponse()
     
-    # Check environment variables
-    health_status["checks"]["env_vars"] = all([
-        os.getenv("TWILIO_ACCOUNT_SID"),
-        os.getenv("TWILIO_AUTH_TOKEN"),
-        os.getenv("TWILIO_PHONE_NUMBER"),
-        os.getenv("SARVAM_API_KEY")
-    ])
-    
-    # Check Sarvam AI connectivity
-    try:
-        from sarvam_ai import SarvamAI
-        sarvam = SarvamAI()
-        await sarvam.close()
-        health_status["checks"]["sarvam_ai"] = True
-    except Exception as e:
-        health_status["checks"]["sarvam_ai"] = False
-        health_status["checks"]["sarvam_error"] = str(e)
-        health_status["status"] = "degraded"
-    
-    # Check Twilio client
-    try:
-        twilio_client.api.accounts(os.getenv("TWILIO_ACCOUNT_SID")).fetch()
-        health_status["checks"]["twilio"] = True
-    except Exception as e:
-        health_status["checks"]["twilio"] = False
-        health_status["checks"]["twilio_error"] = str(e)
-        health_status["status"] = "degraded"
+    if OVERLOAD_ACTION == "redirect" and OVERLOAD_REDIRECT_NUMBER:
+        # Hand the call to a human line instead of a degraded bot
+        response.say("All our lines are busy. Connecting you to an agent.", voice="Polly.Aditi", language="en-IN")
+        response.dial(OVERLOAD_REDIRECT_NUMBER)
+    elif OVERLOAD_ACTION == "wait" and wait_count < OVERLOAD_MAX_WAITS:
+        # Hold the caller and re-check capacity after a pause
+        if wait_count == 0:
+            response.say("All our lines are busy. Please stay on the line.", voice="Polly.Aditi", language="en-IN")
+            response.say("कृपया लाइन पर बने रहें।", voice="Polly.Aditi", language="hi-IN")
+            response.say("Dayachesi line lo undandi.", voice="Polly.Aditi", language="en-IN")
+        response.pause(length=OVERLOAD_WAIT_SECONDS)
+        response.redirect(f'/voice/incoming?wait={wait_count + 1}')
+    else:
+        response.say("All our lines are busy. Please call again later.", voice="Polly.Aditi", language="en-IN")
+        response.say("सभी लाइनें व्यस्त हैं। कृपया बाद में कॉल करें।", voice="Polly.Aditi", language="hi-IN")
+        response.say("Anni linelu bijeegaa unnaayi. Dayachesi tarvaata call cheyandi.", voice="Polly.Aditi", language="en-IN")
+        response.hangup()
     
-    return health_status
+    return response
 
 
 @app.post("/voice/incoming")
@@ -92,11 +294,27 @@ async def incoming_call(request: Request):
     
     logger.info(f"📞 Incoming call: {call_sid} from {from_number}")
     
+    # Admission control: answer fast instead of connecting a stream we can't serve well
+    if not admission.try_admit(call_sid):
+        wait_count = int(request.query_params.get("wait", "0") or 0)
+        logger.warning(f"🚦 Server at capacity, overload action '{OVERLOAD_ACTION}' for {call_sid} (wait #{wait_count})")
+        return Response(content=str(overload_response(wait_count)), media_type="application/xml")
+    
+    # Fast path: connect the stream now and run the language menu inside it (needs the pre-rendered menu)
+    if IVR_MODE == "stream" and phrase_cache.joined(LANGUAGE_MENU) is not None:
+        response = VoiceResponse()
+        connect = Connect()
+        stream = Stream(url=f'wss://{request.url.hostname}/media-stream')
+        stream.parameter(name='ivr', value='dtmf')
+        connect.append(stream)
+        response.append(connect)
+        return Response(content=str(response), media_type="application/xml")
+    
     # Create TwiML response with language selection
     response = VoiceResponse()
     
-    # Check if this is a retry (from query params)
-    retry = form_data.get("retry", "0")
+    # Check if this is a retry (query params; Twilio POSTs redirects without them in the form)
+    retry = request.query_params.get("retry") or form_data.get("retry", "0")
     
     # Gather language selection (DTMF input)
     gather = response.gather(
@@ -145,15 +363,8 @@ async def language_selected(request: Request):
     else:
         form_data = await request.form()
     
-    digit = form_data.get("Digits", "")
-    retry = form_data.get("retry", "0")
-    
-    # Map digit to language
-    language_map = {
-        "1": {"code": "te-IN", "name": "Telugu"},
-        "2": {"code": "hi-IN", "name": "Hindi"},
-        "3": {"code": "en-IN", "name": "English"}
-    }
+    digit = form_data.get("Digits") or request.query_params.get("Digits", "")
+    retry = request.query_params.get("retry") or form_data.get("retry", "0")
     
     # Validate digit and get language
     if digit not in language_map:
@@ -202,237 +413,294 @@ async def media_stream(websocket: WebSocket):
     """Handle Twilio media stream WebSocket with full AI conversation"""
     await websocket.accept()
     
-    # Get selected language from Twilio's start event (will be set when stream starts)
-    selected_language = "te-IN"  # Default, will be overridden by start event
+    # Language comes from Twilio's start event; default until then.
+    # Opt-in call capture for replay (CALL_CAPTURE_DIR)
+    session = CallSession(DEFAULT_LANGUAGE, recorder=CallRecorder.from_env())
+    recorder = session.recorder
+    playback = session.playback
     logger.info(f"🔌 WebSocket connected, waiting for language from start event...")
     
-    from sarvam_ai import SarvamAI
-    from audio_utils import decode_mulaw_base64, mulaw_to_wav, wav_to_mulaw, encode_mulaw_base64
-    import json
-    import audioop
-    
-    try:
-        sarvam = SarvamAI()
-    except ValueError as e:
-        logger.error(f"❌ Failed to initialize Sarvam AI: {e}")
-        await websocket.close(code=1011, reason="Configuration error")
-        return
-    
-    stream_sid = None
-    audio_buffer = bytearray()
     stream_ready = False
-    
-    # Voice Activity Detection (VAD) settings
-    is_speaking = False
-    is_processing = False  # Prevent concurrent processing
-    silence_threshold = 1600  # ~200ms of silence at 8kHz (faster response)
-    silence_buffer = bytearray()
-    min_speech_length = 4000  # Minimum 0.5 seconds of speech (reduced from 6000 for better responsiveness)
-    max_speech_length = 40000  # Maximum 5 seconds of speech
-    
-    # Adaptive noise threshold
-    noise_floor = 500  # Initial noise floor (higher to avoid false triggers)
-    speech_threshold = 1000  # Initial speech threshold (higher for clearer speech)
-    
-    # Conversation tracking and analytics
-    call_start_time = asyncio.get_event_loop().time()
-    failed_stt_count = 0  # Track consecutive STT failures
-    max_failed_attempts = 3  # Offer human transfer after 3 failures
-    query_count = 0  # Track number of queries in this call
-    last_user_query = None  # Remember last query for context
-    
-    # Conversation context with language-specific system prompt
-    language_names = {
-        "te-IN": "Telugu",
-        "hi-IN": "Hindi", 
-        "en-IN": "English"
-    }
-    
-    # Initialize messages as empty - will be set when language is received
-    messages = []
-    
-    async def process_speech_buffer():
-        """Process accumulated speech buffer"""
-        nonlocal is_speaking, is_processing, audio_buffer, silence_buffer, messages
-        nonlocal failed_stt_count, query_count, last_user_query
+    admitted = False  # Holds an admission slot (released in finally)
+    
+    async def play_audio(mulaw: bytes) -> int:
+        """Send mulaw audio to Twilio in the configured playout mode; returns messages sent"""
+        audio_duration = len(mulaw) / 8000  # Duration in seconds at 8kHz
+        logger.info(f"📤 Sending {len(mulaw)} mulaw bytes to Twilio (duration: {audio_duration:.2f}s)")
+        await stop_masking()  # The reply cuts in over the acknowledgement clip
+        session.set_state("playing")
+        
+        # Clear any queued audio from Twilio before sending our response
+        await send_clear(websocket, session.stream_sid)
+        
+        if PLAYOUT_MODE == "bulk":
+            # Large chunks + marks; Twilio paces playback and echoes marks as it goes
+            messages_sent = await send_bulk(websocket, session.stream_sid, mulaw, playback)
+        else:
+            # Real-time 20ms chunks (160 bytes at 8kHz)
+            messages_sent = await send_paced(websocket, session.stream_sid, mulaw)
+        logger.info(f"📨 Sent {messages_sent} messages ({PLAYOUT_MODE} playout)")
+        return messages_sent
+    
+    async def stop_masking():
+        """Stop the acknowledgement clip, if one is pending or playing"""
+        if session.mask is not None:
+            mask, session.mask = session.mask, None
+            await mask.stop()
+            if mask.fired:
+                session.masked_turns += 1
+    
+    async def finish_turn():
+        """Unlock processing and go back to listening"""
+        await stop_masking()
+        session.is_processing = False
+        session.set_state("listening")
+    
+    def start_conversation():
+        """Initialize the system prompt once the language is known"""
+        selected_lang_name = language_names.get(session.language, "Telugu")
+        session.messages.clear()  # Clear any existing messages
+        session.messages.append({
+            "role": "system",
+            "content": system_prompts.get(session.language, system_prompts[DEFAULT_LANGUAGE])
+        })
+        session.set_state("listening")
+        logger.info(f"✅ System prompt initialized for {selected_lang_name}")
+    
+    async def run_language_menu(retry: bool):
+        """Play the pre-rendered language menu, then default to Telugu if no digit arrives"""
+        session.ivr_attempts += 1
+        menu = phrase_cache.joined(LANGUAGE_MENU_RETRY if retry else LANGUAGE_MENU)
+        menu_end = asyncio.get_event_loop().time() + len(menu) / 8000
+        await play_audio(menu)
+        session.set_state("menu")
+        await asyncio.sleep(max(0.0, menu_end - asyncio.get_event_loop().time()) + IVR_DTMF_TIMEOUT)
+        logger.info(f"⏱️ No language selected, defaulting to {DEFAULT_LANGUAGE}")
+        await select_language(DEFAULT_LANGUAGE, "timeout")
+    
+    def start_language_menu(retry: bool = False):
+        if session.ivr_task is not None:
+            session.ivr_task.cancel()
+        session.set_state("menu")
+        session.ivr_task = asyncio.create_task(run_language_menu(retry))
+    
+    async def select_language(language: str, how: str):
+        """End the in-stream menu, confirm the language and start the conversation"""
+        task = session.ivr_task
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        await send_clear(websocket, session.stream_sid)  # Cut the menu prompt
+        session.language = language
+        session.record_latency("ivr", session.duration)
+        logger.info(f"🌐 Language {language} selected in-stream ({how}) {session.duration:.1f}s after connect")
+        start_conversation()
+        confirmation = phrase_cache.audio("language_confirmed", language)
+        if confirmation:
+            await play_audio(confirmation)
+            session.set_state("listening")
+        # Media is ignored while ivr_task is set, so speech can't start a reply over the confirmation
+        if session.ivr_task is task:
+            session.ivr_task = None
+    
+    async def barge_in():
+        """Caller is speaking over a bulk-mode reply Twilio is still playing: stop it, keep only what was heard"""
+        await send_clear(websocket, session.stream_sid)
+        heard = playback.interrupt()
+        logger.info(f"✋ Caller interrupted the reply after {heard:.0%}")
+        messages = session.messages
+        if messages and messages[-1]["role"] == "assistant":
+            messages[-1]["content"] = truncate_to_heard(messages[-1]["content"], heard)
+    
+    async def process_speech_buffer(reason: str):
+        """Process accumulated speech buffer (reason: what ended the turn, for capture)"""
+        audio_buffer = session.audio_buffer
+        selected_language = session.language
+        messages = session.messages
         
         # Prevent concurrent processing
-        if is_processing:
+        if session.is_processing:
             logger.warning("⚠️ Already processing speech, ignoring new input")
-            audio_buffer.clear()
-            silence_buffer.clear()
-            is_speaking = False
+            if recorder:
+                recorder.turn(session.speech_bytes, reason, "busy")
+            session.ignored_turns += 1
+            session.reset_speech()
             return
         
-        if len(audio_buffer) < min_speech_length:
-            logger.warning(f"⚠️ Speech too short ({len(audio_buffer)} bytes), ignoring")
-            audio_buffer.clear()
-            silence_buffer.clear()
-            is_speaking = False
+        speech_bytes = session.speech_bytes
+        if speech_bytes < MIN_SPEECH_LENGTH:
+            logger.warning(f"⚠️ Speech too short ({speech_bytes} bytes), ignoring")
+            if recorder:
+                recorder.turn(speech_bytes, reason, "too_short")
+            session.ignored_turns += 1
+            session.reset_speech()
             return
         
-        is_processing = True  # Lock processing
+        session.is_processing = True  # Lock processing
+        session.turns += 1
+        
+        logger.info(f"🔊 Processing {speech_bytes} bytes of speech")
+        if recorder:
+            recorder.turn(speech_bytes, reason, "processed")
         
-        logger.info(f"🔊 Processing {len(audio_buffer)} bytes of speech")
+        # Barge-in not caught while the caller was speaking (reply started during the turn)
+        if playback.is_playing:
+            await barge_in()
+        
+        # Long turn: earlier segments are already being transcribed, only the rest is left
+        segments, session.stt_segments = session.stt_segments, None
         
         # Convert to WAV
         mulaw_bytes = bytes(audio_buffer)
-        wav_data = mulaw_to_wav(mulaw_bytes)
+        wav_data = mulaw_to_wav(mulaw_bytes) if segments is None else b""
         
         # Reset buffers
-        audio_buffer.clear()
-        silence_buffer.clear()
-        is_speaking = False
+        session.reset_speech()
         
-        if not wav_data or len(wav_data) < 100:
+        if segments is None and (not wav_data or len(wav_data) < 100):
             logger.warning("⚠️ WAV conversion failed or too small")
-            is_processing = False  # Unlock on error
+            await finish_turn()  # Unlock on error
             return
         
         # STT with user's selected language (force it, don't auto-detect)
         try:
+            session.set_state("stt")
             stt_start = asyncio.get_event_loop().time()
-            text, detected_lang = await sarvam.speech_to_text(wav_data, language=selected_language)
+            if segments is None:
+                text, detected_lang = await sarvam.speech_to_text(wav_data, language=selected_language)
+            else:
+                text = await segments.finish(mulaw_bytes)  # Each segment is captured as it is sent
             stt_duration = asyncio.get_event_loop().time() - stt_start
+            session.record_latency("stt", stt_duration)
+            if recorder and segments is None:
+                recorder.upstream("stt", stt_start, stt_duration, transcript=text)
             
             # Override detected language with selected language to maintain consistency
             detected_lang = selected_language
             
             if not text or len(text.strip()) <= 2:
                 logger.warning(f"⚠️ No speech detected or transcript too short: '{text}'")
-                failed_stt_count += 1
+                session.failed_stt_count += 1
                 
                 # Offer human transfer after multiple failures
-                if failed_stt_count >= max_failed_attempts:
-                    logger.warning(f"⚠️ {failed_stt_count} consecutive STT failures, offering human transfer")
-                    fallback_msg = {
-                        "te-IN": "క్షమించండి, నేను మీ మాటలు అర్థం చేసుకోలేకపోతున్నాను. మానవ ఏజెంట్‌కు కనెక్ట్ చేయాలా?",
-                        "hi-IN": "क्षमा करें, मैं आपकी बात समझ नहीं पा रहा हूं। क्या मैं आपको किसी व्यक्ति से जोड़ूं?",
-                        "en-IN": "Sorry, I'm having trouble understanding you. Would you like to speak with a human agent?"
-                    }
-                    # Send fallback message (implementation would need TTS here)
-                    logger.info(f"📞 Fallback: {fallback_msg.get(selected_language)}")
+                if session.failed_stt_count >= MAX_FAILED_STT_ATTEMPTS:
+                    logger.warning(f"⚠️ {session.failed_stt_count} consecutive STT failures, offering human transfer")
+                    logger.info(f"📞 Fallback: {phrase_cache.text('stt_fallback', selected_language)}")
+                    # Only spoken when pre-rendered during warm-up (no live TTS on this path)
+                    fallback_audio = phrase_cache.audio("stt_fallback", selected_language)
+                    if fallback_audio and session.stream_sid:
+                        await play_audio(fallback_audio)
                 
-                is_processing = False  # Unlock
+                await finish_turn()  # Unlock
                 return
             
-            # Reset failure count on successful STT
-            failed_stt_count = 0
-            query_count += 1
-            last_user_query = text
+            # Latency masking: acknowledge the caller if the reply takes longer than MASK_DELAY_MS after
+            # the turn ended. Armed only now, so turns without a transcript don't get "one moment" and then silence
+            session.mask = masking.start(websocket, session.stream_sid, phrase_cache.audio("ack", selected_language),
+                                         elapsed_s=stt_duration)
             
-            logger.info(f"👤 User said ({detected_lang}): {text} [STT: {stt_duration:.2f}s, Query #{query_count}]")
+            # Reset failure count on successful STT
+            session.failed_stt_count = 0
+            session.query_count += 1
+            last_user_query = session.last_user_query
+            session.last_user_query = text
             
-            # Check for transfer keywords
-            transfer_keywords = {
-                "te-IN": ["మానవుడు", "ఆపరేటర్", "వ్యక్తి", "ఎవరైనా"],
-                "hi-IN": ["मानव", "ऑपरेटर", "व्यक्ति", "कोई"],
-                "en-IN": ["human", "operator", "person", "agent", "someone", "transfer"]
-            }
+            logger.info(f"👤 User said ({detected_lang}): {text} [STT: {stt_duration:.2f}s, Query #{session.query_count}]")
             
-            text_lower = text.lower()
-            if any(keyword in text_lower for keyword in transfer_keywords.get(selected_language, [])):
-                logger.info(f"🔄 Transfer requested by user")
-                transfer_msg = {
-                    "te-IN": "మానవ ఏజెంట్‌కు కనెక్ట్ చేస్తున్నాను. దయచేసి వేచి ఉండండి.",
-                    "hi-IN": "मैं आपको किसी व्यक्ति से जोड़ रहा हूं। कृपया प्रतीक्षा करें।",
-                    "en-IN": "Connecting you to a human agent. Please wait."
-                }
-                response = transfer_msg.get(selected_language, transfer_msg["te-IN"])
+            cached_audio = None  # Pre-rendered reply audio, skips TTS when set
+            intent = intents.match(text)
+            if intent:
+                logger.info(f"⚡ Intent '{intent.intent}' matched ('{intent.pattern}'), replying without the LLM")
+                response = phrase_cache.text(intent.reply_key, selected_language)
+                cached_audio = phrase_cache.audio(intent.reply_key, selected_language)
+                llm_duration = 0.0  # No LLM round trip for templated replies
+                intents.record_saved(intent.intent, model_router.predicted_llm(model_router.tiers[0])
+                                     + (model_router.predicted_tts() if cached_audio else 0.0))
                 messages.append({"role": "user", "content": text})
                 messages.append({"role": "assistant", "content": response})
             else:
                 # Add conversation memory context
-                if query_count > 1 and last_user_query:
+                if session.query_count > 1 and last_user_query:
                     context_note = f"\n[Previous query: {last_user_query}]"
                     messages.append({"role": "user", "content": text + context_note})
                 else:
                     messages.append({"role": "user", "content": text})
                 
-                # LLM
+                # LLM, on the best configuration the rest of the turn budget allows
+                session.set_state("llm")
                 llm_start = asyncio.get_event_loop().time()
-                response = await sarvam.chat(messages)
+                route = model_router.route(session.route_tier, llm_start - stt_start)
+                session.route_tier = route.index
+                response = await sarvam.chat(
+                    model_router.messages_for(route, messages),
+                    model=route.tier["model"],
+                    max_tokens=route.tier["max_tokens"]
+                )
                 llm_duration = asyncio.get_event_loop().time() - llm_start
-                logger.info(f"🤖 LLM response time: {llm_duration:.2f}s")
+                model_router.record_llm(route, llm_duration)
+                session.record_latency("llm", llm_duration)
+                if recorder:
+                    recorder.upstream("llm", llm_start, llm_duration, response=response, tier=route.tier["name"])
+                logger.info(f"🤖 LLM response time: {llm_duration:.2f}s ({route.tier['name']} tier)")
                 
                 messages.append({"role": "assistant", "content": response})
             
-            # Keep conversation short
-            if len(messages) > 11:
-                messages = [messages[0]] + messages[-10:]
+            # Keep conversation short (trimmed in place; the session owns the list)
+            if len(messages) > MAX_HISTORY_MESSAGES:
+                del messages[1:-(MAX_HISTORY_MESSAGES - 1)]
             
             logger.info(f"🤖 AI responds: {response}")
             
-            # TTS in the user's SELECTED language (not detected)
-            tts_start = asyncio.get_event_loop().time()
-            tts_wav = await sarvam.text_to_speech(response, selected_language)
-            tts_duration = asyncio.get_event_loop().time() - tts_start
-            logger.info(f"🎵 TTS generation time: {tts_duration:.2f}s")
-            
-            if tts_wav:
+            # TTS in the user's SELECTED language (not detected); fixed phrases come pre-rendered
+            if cached_audio:
+                response_mulaw = cached_audio
+                tts_duration = 0.0
+                logger.info("🎵 TTS skipped, using pre-rendered phrase")
+            else:
+                session.set_state("tts")
+                tts_start = asyncio.get_event_loop().time()
+                tts_wav = await sarvam.text_to_speech(
+                    response, selected_language, pace=model_router.tiers[session.route_tier]["tts_pace"]
+                )
+                tts_duration = asyncio.get_event_loop().time() - tts_start
+                if tts_wav:
+                    model_router.record_tts(tts_duration)
+                session.record_latency("tts", tts_duration)
+                if recorder:
+                    recorder.upstream("tts", tts_start, tts_duration, response_bytes=len(tts_wav))
+                logger.info(f"🎵 TTS generation time: {tts_duration:.2f}s")
+                
+                if not tts_wav:
+                    logger.error("❌ TTS returned empty audio")
+                    await finish_turn()  # Unlock on error
+                    return
+                
                 # Convert WAV to raw mulaw (8kHz, mono) for Twilio
                 response_mulaw = wav_to_mulaw(tts_wav)
-                
-                if response_mulaw:
-                    # Check if we have a valid stream_sid
-                    if not stream_sid:
-                        logger.error("❌ No stream_sid available, cannot send audio")
-                        is_processing = False
-                        return
-                    
-                    audio_duration = len(response_mulaw) / 8000  # Duration in seconds at 8kHz
-                    logger.info(f"📤 Sending {len(response_mulaw)} mulaw bytes to Twilio (duration: {audio_duration:.2f}s)")
-                    
-                    # Clear any queued audio from Twilio before sending our response
-                    try:
-                        clear_msg = {
-                            "event": "clear",
-                            "streamSid": stream_sid
-                        }
-                        await websocket.send_text(json.dumps(clear_msg))
-                    except Exception as clear_error:
-                        logger.warning(f"⚠️ Failed to clear audio queue: {clear_error}")
-                    
-                    # Send back to Twilio in 20ms chunks (160 bytes at 8kHz)
-                    chunk_size = 160  # 20ms chunks at 8kHz
-                    send_start = asyncio.get_event_loop().time()
-                    for i in range(0, len(response_mulaw), chunk_size):
-                        # Check if WebSocket is still connected
-                        if websocket.client_state.name != "CONNECTED":
-                            logger.warning("⚠️ WebSocket disconnected, stopping audio send")
-                            break
-                        
-                        chunk = response_mulaw[i:i+chunk_size]
-                        encoded = encode_mulaw_base64(chunk)
-                        
-                        media_msg = {
-                            "event": "media",
-                            "streamSid": stream_sid,
-                            "media": {"payload": encoded}
-                        }
-                        
-                        try:
-                            await websocket.send_text(json.dumps(media_msg))
-                            await asyncio.sleep(0.02)  # 20ms delay
-                        except Exception as send_error:
-                            logger.warning(f"⚠️ Failed to send audio chunk: {send_error}")
-                            break
-                    
-                    send_duration = asyncio.get_event_loop().time() - send_start
-                    total_time = asyncio.get_event_loop().time() - stt_start
-                    logger.info(f"⏱️ Total response time: {total_time:.2f}s (STT: {stt_duration:.2f}s, LLM: {llm_duration:.2f}s, TTS: {tts_duration:.2f}s, Send: {send_duration:.2f}s)")
-                    
-                    is_processing = False  # Unlock after response sent
-                else:
-                    logger.error("❌ Failed to convert TTS to mulaw")
-                    is_processing = False  # Unlock on error
-            else:
-                logger.error("❌ TTS returned empty audio")
-                is_processing = False  # Unlock on error
+            
+            if not response_mulaw:
+                logger.error("❌ Failed to convert TTS to mulaw")
+                await finish_turn()  # Unlock on error
+                return
+            
+            # Check if we have a valid stream_sid
+            if not session.stream_sid:
+                logger.error("❌ No stream_sid available, cannot send audio")
+                await finish_turn()
+                return
+            
+            send_start = asyncio.get_event_loop().time()
+            await play_audio(response_mulaw)
+            send_duration = asyncio.get_event_loop().time() - send_start
+            total_time = asyncio.get_event_loop().time() - stt_start
+            session.record_latency("send", send_duration)
+            session.record_latency("total", total_time)
+            logger.info(f"⏱️ Total response time: {total_time:.2f}s (STT: {stt_duration:.2f}s, LLM: {llm_duration:.2f}s, TTS: {tts_duration:.2f}s, Send: {send_duration:.2f}s)")
+            
+            await finish_turn()  # Unlock after response sent
                 
         except Exception as e:
             logger.error(f"❌ Error in speech processing: {e}")
-            is_processing = False
+            await finish_turn()
             return
     
     try:
@@ -440,63 +708,48 @@ async def media_stream(websocket: WebSocket):
             # Add timeout to prevent zombie connections
             data = await asyncio.wait_for(websocket.receive_text(), timeout=300.0)  # 5 min timeout
             event = json.loads(data)
+            if recorder:
+                recorder.event(event)
             
             event_type = event.get("event")
             
             if event_type == "start":
                 stream_sid = event["start"]["streamSid"]
+                session.stream_sid = stream_sid
+                session.call_sid = event["start"].get("callSid", stream_sid)
+                
+                # Hard cap on active streams (covers outbound calls that skip /voice/incoming)
+                if not admission.stream_started(session.call_sid, stream_sid):
+                    logger.warning(f"🚦 At capacity, refusing stream {stream_sid}")
+                    break
+                admitted = True
                 stream_ready = True
+                call_registry.add(session)
                 
                 # Get language from custom parameters sent by Twilio
                 custom_params = event["start"].get("customParameters", {})
                 if "language" in custom_params:
-                    selected_language = custom_params["language"]
-                    logger.info(f"🎙️ Stream started: {stream_sid} with language: {selected_language}")
+                    session.language = custom_params["language"]
+                    logger.info(f"🎙️ Stream started: {stream_sid} with language: {session.language}")
+                elif custom_params.get("ivr") == "dtmf":
+                    # IVR_MODE=stream: language menu runs here, selection arrives as dtmf events
+                    logger.info(f"🎙️ Stream started: {stream_sid}, playing in-stream language menu")
+                    start_language_menu()
+                    continue
                 else:
-                    logger.warning(f"⚠️ No language parameter received, using default: {selected_language}")
+                    logger.warning(f"⚠️ No language parameter received, using default: {session.language}")
                     logger.info(f"🎙️ Stream started: {stream_sid}")
                 
                 # NOW initialize the system prompt with the correct language
-                selected_lang_name = language_names.get(selected_language, "Telugu")
-                messages.clear()  # Clear any existing messages
-                messages.append({
-                    "role": "system",
-                    "content": f"""You are a helpful customer support agent for the Electrical Department in India.
-
-CRITICAL: User selected {selected_lang_name} language. You MUST respond ONLY in {selected_lang_name}.
-
-Your responsibilities:
-- Handle electrical complaints (power outages, voltage issues, meter problems)
-- Provide information about electricity bills and payments
-- Help with new connection requests
-- Report electrical hazards and emergencies
-- Provide lineman contact numbers and department information
-
-Guidelines:
-- Keep responses SHORT and CONCISE (2-3 sentences maximum for voice calls)
-- Be professional, polite, and helpful
-- Ask ONE clear question at a time
-- If you don't have specific information, acknowledge briefly and offer to connect to a human agent
-- For emergencies, prioritize safety and provide emergency contact: 1912
-
-Common queries you can help with:
-- Power outage complaints
-- High electricity bill queries
-- New connection applications
-- Meter reading issues
-- Lineman contact numbers
-- Payment methods
-- Emergency electrical issues
-
-Remember: ALWAYS respond in {selected_lang_name} language only!"""
-                })
-                logger.info(f"✅ System prompt initialized for {selected_lang_name}")
+                start_conversation()
             
             elif event_type == "media":
                 # Wait for stream to be ready before processing audio
-                if not stream_ready or not stream_sid:
+                if not stream_ready:
                     logger.warning("⚠️ Received media before stream ready, skipping...")
                     continue
+                if session.ivr_task is not None:
+                    continue  # Language menu: waiting for a digit, not speech
                 
                 # Receive audio from Twilio
                 payload = event["media"]["payload"]
@@ -508,43 +761,72 @@ Remember: ALWAYS respond in {selected_lang_name} language only!"""
                 rms = audioop.rms(pcm_data, 2)  # Get volume level
                 
                 # Adaptive threshold: update noise floor when not speaking
-                if not is_speaking and rms < noise_floor * 1.5:
-                    noise_floor = int(noise_floor * 0.95 + rms * 0.05)  # Smooth update
-                    speech_threshold = max(noise_floor * 3, 800)  # Speech is 3x noise floor, minimum 800
+                if not session.is_speaking and rms < session.noise_floor * 1.5:
+                    session.noise_floor = int(session.noise_floor * 0.95 + rms * 0.05)  # Smooth update
+                    session.speech_threshold = max(session.noise_floor * 3, 800)  # Speech is 3x noise floor, minimum 800
                 
                 # Detect if user is speaking (volume above adaptive threshold)
-                is_speech = rms > speech_threshold
+                is_speech = rms > session.speech_threshold
                 
                 if is_speech:
                     # User is speaking
-                    if not is_speaking:
-                        logger.info(f"🎤 Speech started (volume: {rms}, threshold: {speech_threshold})")
-                        is_speaking = True
+                    if not session.is_speaking:
+                        logger.info(f"🎤 Speech started (volume: {rms}, threshold: {session.speech_threshold})")
+                        session.is_speaking = True
+                    
+                    # The silence itself is dropped; remember where it was as a cut point for segmented STT
+                    if len(session.silence_buffer) >= PAUSE_MIN_BYTES:
+                        session.speech_pauses.append(len(session.audio_buffer))
+                    session.audio_buffer.extend(mulaw_data)
+                    session.silence_buffer.clear()
+                    
+                    # Barge-in: stop a bulk-mode reply as soon as the caller has clearly started talking over it
+                    if playback.is_playing and session.speech_bytes >= MIN_SPEECH_LENGTH:
+                        await barge_in()
                     
-                    audio_buffer.extend(mulaw_data)
-                    silence_buffer.clear()
+                    # Long turn: send the completed segment to STT while the caller keeps talking
+                    if STT_SEGMENT_MS and not session.is_processing and len(session.audio_buffer) >= SEGMENT_BYTES:
+                        if session.stt_segments is None:
+                            session.stt_segments = SegmentedSTT(sarvam, session.language, segment_stats, recorder)
+                        session.stt_segments.split(session.audio_buffer, session.speech_pauses)
                     
-                    # Prevent buffer from getting too large
-                    if len(audio_buffer) > max_speech_length:
-                        logger.warning(f"⚠️ Max speech length reached ({len(audio_buffer)} bytes), processing...")
-                        await process_speech_buffer()
+                    # Bound the turn (MAX_TURN_MS)
+                    if session.speech_bytes > MAX_SPEECH_LENGTH:
+                        logger.warning(f"⚠️ Max turn length reached ({session.speech_bytes} bytes), processing...")
+                        await process_speech_buffer("max_length")
                     
                     # Safety: prevent unbounded growth if processing fails
-                    if len(audio_buffer) > max_speech_length * 2:
-                        logger.error(f"❌ Audio buffer overflow ({len(audio_buffer)} bytes), clearing...")
-                        audio_buffer.clear()
-                        silence_buffer.clear()
-                        is_speaking = False
+                    if len(session.audio_buffer) > MAX_SPEECH_LENGTH * 2:
+                        logger.error(f"❌ Audio buffer overflow ({len(session.audio_buffer)} bytes), clearing...")
+                        session.reset_speech()
                 else:
                     # Silence or low volume
-                    if is_speaking:
+                    if session.is_speaking:
                         # User was speaking, now silence
-                        silence_buffer.extend(mulaw_data)
+                        session.silence_buffer.extend(mulaw_data)
                         
                         # If enough silence after speech, process it
-                        if len(silence_buffer) >= silence_threshold:
+                        if len(session.silence_buffer) >= SILENCE_THRESHOLD:
                             logger.info(f"🔇 Silence detected after speech")
-                            await process_speech_buffer()
+                            await process_speech_buffer("silence")
+            
+            elif event_type == "dtmf":
+                digit = event.get("dtmf", {}).get("digit", "")
+                if session.ivr_task is None:
+                    logger.info(f"🔢 DTMF {digit} ignored (no menu active)")
+                elif digit in language_map:
+                    await select_language(language_map[digit]["code"], f"digit {digit}")
+                elif session.ivr_attempts < 2:
+                    # First invalid key: play the menu again
+                    logger.warning(f"⚠️ Invalid digit pressed: {digit}")
+                    start_language_menu(retry=True)
+                else:
+                    logger.info("⚠️ Second invalid attempt, defaulting to Telugu")
+                    await select_language(DEFAULT_LANGUAGE, "invalid input")
+            
+            elif event_type == "mark":
+                # Twilio reached a mark we placed after a bulk audio chunk
+                playback.on_mark(event.get("mark", {}).get("name", ""))
             
             elif event_type == "stop":
                 logger.info("🛑 Stream stopped")
@@ -557,16 +839,25 @@ Remember: ALWAYS respond in {selected_lang_name} language only!"""
     
     finally:
         # Call analytics summary
-        call_duration = asyncio.get_event_loop().time() - call_start_time
         logger.info(f"""
 📊 Call Summary:
-   - Duration: {call_duration:.1f}s
-   - Language: {selected_language}
-   - Queries handled: {query_count}
-   - Failed STT attempts: {failed_stt_count}
-   - Stream ID: {stream_sid}
+   - Duration: {session.duration:.1f}s
+   - Language: {session.language}
+   - Queries handled: {session.query_count}
+   - Failed STT attempts: {session.failed_stt_count}
+   - Stream ID: {session.stream_sid}
         """)
-        await sarvam.close()
+        call_registry.remove(session)
+        if session.mask is not None:
+            session.mask.abort()
+        if session.ivr_task is not None:
+            session.ivr_task.cancel()
+        if session.stt_segments is not None:
+            session.stt_segments.cancel()
+        if recorder:
+            recorder.close()
+        if admitted:
+            admission.stream_ended(session.stream_sid)
         
         # Only close if not already closed
         if websocket.client_state.name == "CONNECTED":
@@ -579,18 +870,114 @@ Remember: ALWAYS respond in {selected_lang_name} language only!"""
             logger.info("🔌 WebSocket already disconnected")
 
 
+def campaign_auth_error(request: Request):
+    """403 response unless the request carries CAMPAIGN_API_TOKEN"""
+    if token_authorized(request.headers.get("authorization", "")):
+        return None
+    logger.warning(f"🔒 Rejected unauthorized {request.method} {request.url.path}")
+    return JSONResponse({"success": False, "error": "Forbidden"}, status_code=403)
+
+
+def campaign_status_url() -> str:
+    """Status callback URL given to Twilio (also the URL its signatures are computed over)"""
+    return f"http://{os.getenv('BASE_URL', 'localhost:8000')}/campaigns/status"
+
+
+def twilio_signature_valid(request: Request, url: str, params: dict) -> bool:
+    from twilio.request_validator import RequestValidator
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    signature = request.headers.get("x-twilio-signature", "")
+    return bool(auth_token and signature) and RequestValidator(auth_token).validate(url, params, signature)
+
+
 @app.post("/call/start")
-async def start_outbound_call(to: str):
+async def start_outbound_call(request: Request, to: str):
     """Start an outbound call"""
+    denied = campaign_auth_error(request)
+    if denied is not None:
+        return denied
     logger.info(f"Starting outbound call to {to}")
     
-    call = twilio_client.calls.create(
-        to=to,
-        from_=os.getenv("TWILIO_PHONE_NUMBER"),
+    call = await campaign_manager.dialer.create_call(
+        to,
         url=f"http://{os.getenv('BASE_URL', 'localhost:8000')}/voice/outbound"
     )
     
-    return {"success": True, "call_sid": call.sid}
+    return {"success": True, "call_sid": call["sid"]}
+
+
+@app.post("/campaigns")
+async def start_campaign(request: Request):
+    """Start an outbound dialing campaign
+    
+    Body: {"numbers": ["+91...", ...], "calls_per_second": 1, "max_active_calls": 10}
+    """
+    denied = campaign_auth_error(request)
+    if denied is not None:
+        return denied
+    try:
+        body = await request.json()
+        numbers, invalid = CampaignManager.validate_numbers(body.get("numbers"))
+        calls_per_second = float(body.get("calls_per_second") or 0) or None
+        max_active_calls = int(body.get("max_active_calls") or 0) or None
+    except (ValueError, TypeError, AttributeError) as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+    
+    if not numbers:
+        return JSONResponse({"success": False, "error": "No valid numbers", "invalid": invalid}, status_code=400)
+    if (calls_per_second is not None and calls_per_second <= 0) or (max_active_calls is not None and max_active_calls <= 0):
+        return JSONResponse({"success": False, "error": "Limits must be positive"}, status_code=400)
+    
+    base_url = os.getenv('BASE_URL', 'localhost:8000')
+    campaign = campaign_manager.start(
+        numbers,
+        answer_url=f"http://{base_url}/voice/outbound",
+        status_callback=campaign_status_url(),
+        calls_per_second=calls_per_second,
+        max_active_calls=max_active_calls,
+    )
+    return {"success": True, "campaign_id": campaign.id, "total": len(numbers), "invalid": invalid}
+
+
+@app.get("/campaigns/{campaign_id}")
+async def campaign_status(request: Request, campaign_id: str, details: bool = True):
+    """Campaign progress with per-number status"""
+    denied = campaign_auth_error(request)
+    if denied is not None:
+        return denied
+    campaign = campaign_manager.get(campaign_id)
+    if campaign is None:
+        return JSONResponse({"success": False, "error": "Unknown campaign"}, status_code=404)
+    return campaign.summary(include_entries=details)
+
+
+@app.post("/campaigns/{campaign_id}/cancel")
+async def cancel_campaign(request: Request, campaign_id: str):
+    """Stop dialing the remaining numbers of a campaign"""
+    denied = campaign_auth_error(request)
+    if denied is not None:
+        return denied
+    campaign = campaign_manager.get(campaign_id)
+    if campaign is None:
+        return JSONResponse({"success": False, "error": "Unknown campaign"}, status_code=404)
+    campaign.cancel()
+    return {"success": True, "campaign_id": campaign_id}
+
+
+@app.post("/campaigns/status")
+async def campaign_call_status(request: Request):
+    """Twilio status callback for campaign calls"""
+    form_data = await request.form()
+    if not twilio_signature_valid(request, campaign_status_url(), dict(form_data)):
+        logger.warning("🔒 Rejected campaign status callback without a valid Twilio signature")
+        return Response(status_code=403)
+    call_sid = form_data.get("CallSid", "")
+    status = form_data.get("CallStatus", "")
+    sequence = form_data.get("SequenceNumber")
+    sequence = int(sequence) if sequence and sequence.isdigit() else None
+    if not campaign_manager.update_status(call_sid, status, form_data.get("CallDuration"), sequence):
+        logger.warning(f"⚠️ Status callback for unregistered call {call_sid}: {status} (kept in case a campaign is still dialing it)")
+    return Response(status_code=204)
 
 
 @app.post("/voice/outbound")
@@ -611,5 +998,15 @@ if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
     is_production = os.getenv("ENVIRONMENT", "development") == "production"
-    logger.info(f"Starting Twilio server on port {port} ({'production' if is_production else 'development'} mode)")
-    uvicorn.run("twilio_server:app", host="0.0.0.0", port=port, reload=not is_production)
+    # Worker processes share the listening socket; each runs its own event loop and per-process state
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    reload = not is_production and workers == 1  # uvicorn cannot reload with multiple workers
+    logger.info(f"Starting Twilio server on port {port} ({'production' if is_production else 'development'} mode, "
+                f"{workers} worker{'s' if workers != 1 else ''})")
+    if workers > 1:
+        # Admission state is shared through ADMISSION_STATE_PATH; start from empty (streams of a previous run are gone)
+        if os.path.exists(ADMISSION_STATE_PATH):
+            os.remove(ADMISSION_STATE_PATH)
+        logger.warning("⚠️ Campaigns, /calls and per-call /metrics are per worker: campaign status callbacks "
+                       "may reach the wrong worker, so do not run campaigns here (see docs/ARCHITECTURE.md)")
+    uvicorn.run("twilio_server:app", host="0.0.0.0", port=port, reload=reload, workers=workers)